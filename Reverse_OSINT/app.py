@@ -1,8 +1,20 @@
 import streamlit as st
 import pandas as pd
 
-from scanner import scan_website
-from tracker_engine import detect_trackers
+from crawler import normalize_url
+from http_cache import ResponseCache, scan_with_cache
+from scan_history import ScanHistory, incremental_scan
+from tracker_engine import script_digest
+
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache()
+
+
+@st.cache_resource
+def get_scan_history():
+    return ScanHistory()
 
 
 def main():
@@ -39,6 +51,15 @@ def main():
         placeholder="https://www.example.com"
     )
 
+    crawl = st.checkbox(
+        "Crawl same-origin pages",
+        help="Trackers often load only on checkout, login or article pages."
+    )
+    if crawl:
+        col_depth, col_pages = st.columns(2)
+        max_depth = col_depth.number_input("Max crawl depth", min_value=1, max_value=5, value=2)
+        max_pages = col_pages.number_input("Max pages", min_value=2, max_value=200, value=25)
+
     # --------------------------------------------------
     # Run Analysis
     # --------------------------------------------------
@@ -46,9 +67,53 @@ def main():
         if not url:
             st.warning("Please enter a valid website URL.")
         else:
-            with st.spinner("Analyzing website tracking technologies..."):
-                scripts = scan_website(url)
-                findings = detect_trackers(scripts)
+            crawl_report = None
+            history = get_scan_history()
+
+            if crawl:
+                with st.spinner("Crawling website and analyzing tracking technologies..."):
+                    try:
+                        crawl_report = incremental_scan(url, history, int(max_depth), int(max_pages))
+                    except Exception as e:
+                        # Nothing was recorded, so the next scan still diffs
+                        # against the last good one
+                        st.error(f"Could not scan {url}: {type(e).__name__}: {e}")
+                        st.stop()
+                    findings = crawl_report["Findings"]
+                    scan_diff = crawl_report["Diff"]
+
+                st.caption(
+                    f"Crawled {crawl_report['Pages Scanned']} pages; "
+                    f"{crawl_report['Script Misses']} new scripts analyzed, "
+                    f"{crawl_report['Script Hits']} reused from history."
+                )
+            else:
+                response_cache = get_response_cache()
+
+                with st.spinner("Analyzing website tracking technologies..."):
+                    try:
+                        scripts, findings, from_cache, _ = scan_with_cache(url, response_cache, memo=history)
+                    except Exception as e:
+                        st.error(f"Could not scan {url}: {type(e).__name__}: {e}")
+                        st.stop()
+                    scan_diff = history.record_scan(
+                        normalize_url(url) or url,
+                        [{
+                            "URL": normalize_url(url) or url,
+                            "Script Hashes": sorted({script_digest(s) for s in scripts}),
+                            "Findings": findings
+                        }],
+                        findings
+                    )
+
+                if from_cache:
+                    st.caption("Page unchanged since the last scan (HTTP 304); cached results reused.")
+
+                cache_stats = response_cache.stats()
+                st.caption(
+                    f"Response cache: {cache_stats['Hits']} hits, {cache_stats['Misses']} misses, "
+                    f"{cache_stats['Bytes Saved']:,} bytes saved."
+                )
 
             # ==================================================
             # EXECUTIVE SUMMARY (UPDATED PARAMETERS)
@@ -127,6 +192,24 @@ def main():
 
             st.dataframe(summary_table, use_container_width=True)
 
+            # ==================================================
+            # CHANGES SINCE LAST SCAN
+            # ==================================================
+            st.subheader("Changes Since Last Scan")
+
+            if scan_diff["First Scan"]:
+                st.info("First recorded scan of this website.")
+            elif not scan_diff["Added"] and not scan_diff["Removed"]:
+                st.success("No trackers added or removed since the last scan.")
+            else:
+                for name in scan_diff["Added"]:
+                    st.write("➕ Added:", name)
+                for name in scan_diff["Removed"]:
+                    st.write("➖ Removed:", name)
+
+            if scan_diff["Changed Pages"]:
+                st.caption(f"Pages with changed scripts: {', '.join(scan_diff['Changed Pages'])}")
+
             # ==================================================
             # TRACKING EVIDENCE 
             # ==================================================
@@ -139,6 +222,24 @@ def main():
                 df = pd.DataFrame(findings)
                 st.dataframe(df, use_container_width=True)
 
+            # ==================================================
+            # PER-PAGE ATTRIBUTION (CRAWL MODE)
+            # ==================================================
+            if crawl_report:
+                st.subheader("Per-Page Attribution")
+
+                pages_df = pd.DataFrame([
+                    {
+                        "Page": page["URL"],
+                        "Depth": page["Depth"],
+                        "Trackers": ", ".join(f["Tracker"] for f in page["Findings"]),
+                        "Error": page["Error"] or ""
+                    }
+                    for page in crawl_report["Pages"]
+                ])
+
+                st.dataframe(pages_df, use_container_width=True)
+
             # ==================================================
             # WHAT THESE TECHNOLOGIES DO 
             # ==================================================
@@ -0,0 +1,109 @@
+import argparse
+import random
+import string
+import time
+
+from tracker_engine import build_matcher, match_keywords
+
+
+# --------------------------------------------------
+# Synthetic Inputs
+# --------------------------------------------------
+def _random_word(rng, low=5, high=14):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(low, high)))
+
+
+def make_tracker_db(keyword_count, keywords_per_tracker=4, seed=7):
+    rng = random.Random(seed)
+    tracker_db = {}
+
+    for i in range(0, keyword_count, keywords_per_tracker):
+        tracker_db[f"tracker_{i}"] = {
+            "company": "Synthetic",
+            "category": "Analytics",
+            "keywords": [_random_word(rng) + "(" for _ in range(keywords_per_tracker)],
+            "description": "Synthetic benchmark tracker."
+        }
+
+    return tracker_db
+
+
+def make_scripts(tracker_db, script_count, script_bytes, hits_per_script=5, seed=11):
+    rng = random.Random(seed)
+    keywords = [k for info in tracker_db.values() for k in info["keywords"]]
+    filler = string.ascii_letters + string.digits + " ;(){}.=\n"
+
+    scripts = []
+    for _ in range(script_count):
+        body = "".join(rng.choice(filler) for _ in range(script_bytes))
+        for keyword in rng.sample(keywords, min(hits_per_script, len(keywords))):
+            pos = rng.randint(0, len(body))
+            body = body[:pos] + keyword + body[pos:]
+        scripts.append(body)
+
+    return scripts
+
+
+# --------------------------------------------------
+# Benchmark
+# --------------------------------------------------
+def naive_detect(tracker_db, scripts):
+    found = set()
+    for info in tracker_db.values():
+        for keyword in info["keywords"]:
+            for script in scripts:
+                if keyword in script:
+                    found.add(keyword)
+    return found
+
+
+def compiled_detect(matcher, scripts):
+    found = set()
+    for script in scripts:
+        found |= match_keywords(matcher, script)
+    return found
+
+
+def run_benchmark(keyword_counts, script_count, script_bytes, skip_naive_above):
+    print(f"{'keywords':>9} {'build s':>9} {'compiled s':>11} {'naive s':>9} {'speedup':>8}")
+
+    for keyword_count in keyword_counts:
+        tracker_db = make_tracker_db(keyword_count)
+        scripts = make_scripts(tracker_db, script_count, script_bytes)
+
+        start = time.perf_counter()
+        matcher = build_matcher(tracker_db)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compiled = compiled_detect(matcher, scripts)
+        compiled_time = time.perf_counter() - start
+
+        if keyword_count > skip_naive_above:
+            print(f"{keyword_count:>9} {build_time:>9.3f} {compiled_time:>11.3f} {'-':>9} {'-':>8}")
+            continue
+
+        start = time.perf_counter()
+        naive = naive_detect(tracker_db, scripts)
+        naive_time = time.perf_counter() - start
+
+        if naive != compiled:
+            raise AssertionError(f"Matcher disagrees with substring scan at {keyword_count} keywords")
+
+        speedup = naive_time / compiled_time if compiled_time else float("inf")
+        print(f"{keyword_count:>9} {build_time:>9.3f} {compiled_time:>11.3f} {naive_time:>9.3f} {speedup:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compiled tracker keyword matcher.")
+    parser.add_argument("--keywords", type=int, nargs="+", default=[16, 100, 1000, 5000, 20000])
+    parser.add_argument("--scripts", type=int, default=20)
+    parser.add_argument("--script-bytes", type=int, default=200_000)
+    parser.add_argument("--skip-naive-above", type=int, default=5000)
+    args = parser.parse_args()
+
+    run_benchmark(args.keywords, args.scripts, args.script_bytes, args.skip_naive_above)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+import argparse
+import heapq
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from host_scheduler import THROTTLE_STATUSES, HostScheduler, parse_retry_after
+from http_cache import ResponseCache, scan_with_cache
+from scan_history import ScanHistory, incremental_scan
+from scanner import USER_AGENT, scan_page
+from tracker_engine import ScriptMemo, detect_trackers
+
+
+# --------------------------------------------------
+# Helpers
+# --------------------------------------------------
+def make_session(pool_size):
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+
+    # One keep-alive pool per host, each large enough for every worker
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+
+def read_urls(path):
+    urls = []
+    seen = set()
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            url = line.strip()
+            if not url or url.startswith("#") or url in seen:
+                continue
+            seen.add(url)
+            urls.append(url)
+
+    return urls
+
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
+
+
+def _scan_one(url, session, timeout, cache, memo, history):
+    start = time.perf_counter()
+    cached = False
+    diff = None
+    fetch = None
+    network_error = False
+
+    try:
+        if history is not None:
+            report = incremental_scan(url, history, session=session, timeout=timeout)
+            findings, diff, fetch = report["Findings"], report["Diff"], report["Fetch"]
+        elif cache is not None:
+            _, findings, cached, fetch = scan_with_cache(url, cache, session, timeout, memo=memo)
+        else:
+            page = scan_page(url, session=session, timeout=timeout)
+            findings = detect_trackers(page["scripts"], memo=memo, urls=page["resources"])
+            fetch = page["fetch"]
+        status, error = "ok", None
+    except Exception as e:
+        # One broken site must not abort a bulk run
+        findings = []
+        status, error = "error", f"{type(e).__name__}: {e}"
+        network_error = isinstance(e, (requests.ConnectionError, requests.Timeout))
+        # A PageFetchError still carries the response, e.g. a 503 to retry
+        fetch = getattr(e, "fetch", None)
+
+    elapsed = time.perf_counter() - start
+    result = {
+        "URL": url,
+        "Status": status,
+        "Error": error,
+        "Elapsed": round(elapsed, 3),
+        "Cached": cached,
+        "Trackers": findings
+    }
+
+    # The host is judged by its own response time, not by the external
+    # scripts and detection that follow it
+    outcome = {
+        "status_code": None,
+        "retry_after": None,
+        "network_error": network_error,
+        "latency": elapsed,
+    }
+
+    if fetch is not None:
+        result["HTTP Status"] = fetch["status_code"]
+        result["Stop Reason"] = fetch["stop_reason"]
+        result["Bytes Read"] = fetch["bytes_read"]
+        outcome["status_code"] = fetch["status_code"]
+        outcome["retry_after"] = parse_retry_after(fetch["retry_after"])
+        outcome["latency"] = fetch["elapsed"]
+
+    if diff is not None:
+        result["Added"] = diff["Added"]
+        result["Removed"] = diff["Removed"]
+
+    return result, outcome
+
+
+def _should_retry(outcome):
+    status_code = outcome["status_code"]
+    return outcome["network_error"] or (
+        status_code is not None and (status_code in THROTTLE_STATUSES or status_code >= 500)
+    )
+
+
+# --------------------------------------------------
+# Bulk Scan
+# --------------------------------------------------
+def bulk_scan(urls, max_workers=32, per_host=4, timeout=10, session=None, cache=None,
+              memo=None, history=None, scheduler=None, max_retries=2):
+    """
+    Scan many websites concurrently and yield one result per URL
+    as soon as it finishes, in completion order. With a ResponseCache,
+    pages are revalidated with conditional requests; a ScriptMemo lets
+    scripts shared between sites be scanned once. With a ScanHistory,
+    each result also lists trackers added and removed since the last run.
+
+    Requests to each host go through a HostScheduler that adapts the
+    host's rate and concurrency (at most per_host) to its responses.
+    Timeouts, connection errors, 429 and 5xx are retried up to
+    max_retries times with jittered backoff, and hosts whose circuit
+    breaker opens have their remaining URLs failed without a request.
+    """
+    session = session or make_session(max_workers)
+    scheduler = scheduler or HostScheduler(max_concurrency=per_host)
+
+    pending = {}
+    for url in urls:
+        pending.setdefault(_host(url), deque()).append((url, 0))
+
+    ready = deque(pending)
+    queued = set(pending)   # hosts in ready, delayed or busy
+    busy = set()            # hosts waiting for one of their requests to finish
+    delayed = []            # (due, host) for rate limited hosts
+    retries = []            # (due, host, url, attempt) waiting out their backoff
+
+    def enqueue(host):
+        if host not in queued and pending[host]:
+            queued.add(host)
+            ready.append(host)
+
+    def fail_host(host, reason):
+        while pending[host]:
+            url, attempt = pending[host].popleft()
+            yield {
+                "URL": url,
+                "Status": "error",
+                "Error": reason,
+                "Elapsed": 0.0,
+                "Cached": False,
+                "Trackers": [],
+                "Attempts": attempt,
+            }
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = {}
+
+        def dispatch():
+            # Round-robin over hosts so one large site cannot hold every
+            # worker while other hosts wait.
+            while ready and len(in_flight) < max_workers:
+                host = ready.popleft()
+                queued.discard(host)
+                if not pending[host]:
+                    continue
+
+                decision, delay = scheduler.acquire(host)
+
+                if decision == "granted":
+                    url, attempt = pending[host].popleft()
+                    future = pool.submit(_scan_one, url, session, timeout, cache, memo, history)
+                    in_flight[future] = (host, url, attempt)
+                    enqueue(host)
+                elif decision == "busy":
+                    queued.add(host)
+                    busy.add(host)
+                elif decision == "wait":
+                    queued.add(host)
+                    heapq.heappush(delayed, (time.monotonic() + delay, host))
+                else:
+                    yield from fail_host(host, f"Circuit open for {host}")
+
+        try:
+            while True:
+                yield from dispatch()
+
+                if not (in_flight or ready or delayed or retries or busy):
+                    break
+
+                due = [heap[0][0] for heap in (delayed, retries) if heap]
+                wait_for = max(0.0, min(due) - time.monotonic()) if due else None
+
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=wait_for, return_when=FIRST_COMPLETED)
+                else:
+                    # Only busy hosts are left when the scheduler is shared
+                    # with another run; poll them again shortly.
+                    time.sleep(wait_for if wait_for is not None else 0.1)
+                    done = ()
+                    for host in busy:
+                        queued.discard(host)
+                        enqueue(host)
+                    busy.clear()
+
+                now = time.monotonic()
+                while delayed and delayed[0][0] <= now:
+                    _, host = heapq.heappop(delayed)
+                    queued.discard(host)
+                    enqueue(host)
+                while retries and retries[0][0] <= now:
+                    _, host, url, attempt = heapq.heappop(retries)
+                    pending[host].appendleft((url, attempt))
+                    enqueue(host)
+
+                for future in done:
+                    host, url, attempt = in_flight.pop(future)
+                    result, outcome = future.result()
+
+                    scheduler.release(
+                        host,
+                        outcome["status_code"],
+                        outcome["latency"],
+                        outcome["network_error"],
+                        outcome["retry_after"],
+                    )
+
+                    if host in busy:
+                        busy.discard(host)
+                        queued.discard(host)
+                    enqueue(host)
+
+                    if (
+                        _should_retry(outcome)
+                        and attempt < max_retries
+                        and not scheduler.is_open(host)
+                    ):
+                        delay = scheduler.backoff(attempt, outcome["retry_after"])
+                        heapq.heappush(retries, (now + delay, host, url, attempt + 1))
+                        continue
+
+                    # Out of retries on a 429/5xx: the page was never scanned
+                    if outcome["status_code"] is not None and _should_retry(outcome):
+                        result["Status"] = "error"
+                        result["Error"] = f"HTTP {outcome['status_code']}"
+
+                    result["Attempts"] = attempt + 1
+                    yield result
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Scan a list of websites for trackers and stream JSONL results."
+    )
+    parser.add_argument("url_file", help="File with one URL per line")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=32, help="Global concurrency limit")
+    parser.add_argument("--per-host", type=int, default=4, help="Max concurrency per host")
+    parser.add_argument("--host-rate", type=float, default=2.0,
+                        help="Initial requests per second per host")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="Retries for timeouts, connection errors, 429 and 5xx")
+    parser.add_argument("--breaker-threshold", type=int, default=5,
+                        help="Consecutive failures before a host is skipped")
+    parser.add_argument("--timeout", type=float, default=10, help="Per-request timeout in seconds")
+    parser.add_argument("--cache", help="SQLite response cache for conditional rescans")
+    parser.add_argument("--memo", help="JSON file persisting per-script detection results")
+    parser.add_argument("--memo-size", type=int, default=50000, help="Max memoized scripts")
+    parser.add_argument("--history", help="SQLite scan history for incremental rescans and diffs")
+    args = parser.parse_args()
+
+    urls = read_urls(args.url_file)
+    cache = ResponseCache(args.cache) if args.cache else None
+    memo = ScriptMemo(args.memo_size, args.memo)
+    history = ScanHistory(args.history) if args.history else None
+    scheduler = HostScheduler(
+        rate=args.host_rate,
+        max_concurrency=args.per_host,
+        failure_threshold=args.breaker_threshold,
+    )
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+
+    ok = failed = 0
+    start = time.perf_counter()
+
+    try:
+        results = bulk_scan(
+            urls, args.workers, args.per_host, args.timeout,
+            cache=cache, memo=memo, history=history,
+            scheduler=scheduler, max_retries=args.retries
+        )
+        for result in results:
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+
+            if result["Status"] == "ok":
+                ok += 1
+            else:
+                failed += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Scanned {ok + failed} URLs ({ok} ok, {failed} failed) in {elapsed:.1f}s",
+        file=sys.stderr
+    )
+    # With --history the history is the detection memo instead
+    if memo.hits or memo.misses:
+        print(
+            f"Script memo: {memo.hits} hits, {memo.misses} misses "
+            f"({memo.hit_ratio():.1%} hit ratio)",
+            file=sys.stderr
+        )
+        memo.save()
+
+    if cache is not None:
+        stats = cache.stats()
+        print(
+            f"Response cache: {stats['Hits']} hits, {stats['Misses']} misses, "
+            f"{stats['Bytes Saved']} bytes saved",
+            file=sys.stderr
+        )
+        cache.close()
+
+    if history is not None:
+        print(
+            f"Scan history: {history.hits} scripts reused, {history.misses} analyzed "
+            f"({history.hit_ratio():.1%} hit ratio)",
+            file=sys.stderr
+        )
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import posixpath
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from fetcher import check_page
+from scanner import scan_page
+from tracker_engine import ScriptMemo, detect_trackers, script_digest
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Links to these are never HTML pages, so they are not queued
+SKIPPED_EXTENSIONS = {
+    ".7z", ".avi", ".css", ".csv", ".doc", ".docx", ".exe", ".gif", ".gz",
+    ".ico", ".jpeg", ".jpg", ".js", ".json", ".mov", ".mp3", ".mp4", ".pdf",
+    ".png", ".ppt", ".pptx", ".rar", ".svg", ".tar", ".webm", ".webp",
+    ".woff", ".woff2", ".xls", ".xlsx", ".xml", ".zip",
+}
+
+
+# --------------------------------------------------
+# URL Handling
+# --------------------------------------------------
+def normalize_url(url):
+    """
+    Canonical form used for de-duplication: lower-case scheme and host,
+    no default port, no fragment, resolved dot segments and sorted query.
+    Returns None for URLs that are not http(s).
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    if port and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+
+    path = parts.path or "/"
+    trailing = path.endswith("/")
+    path = posixpath.normpath(path)
+    if path.startswith("//"):
+        path = "/" + path.lstrip("/")
+    if trailing and path != "/":
+        path += "/"
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return parts.scheme, parts.netloc
+
+
+def _is_page_link(url):
+    extension = posixpath.splitext(urlsplit(url).path)[1].lower()
+    return extension not in SKIPPED_EXTENSIONS
+
+
+# --------------------------------------------------
+# Crawl
+# --------------------------------------------------
+def _scan(url, depth, session, timeout, memo, raise_errors=False):
+    try:
+        page = scan_page(url, session, timeout)
+        check_page(page["fetch"])
+    except Exception as e:
+        if raise_errors:
+            raise
+        fetch = getattr(e, "fetch", None)
+        return {"URL": url, "Depth": depth, "Error": f"{type(e).__name__}: {e}",
+                "HTTP Status": fetch["status_code"] if fetch else None,
+                "Findings": [], "Script Hashes": [], "Links": [], "Fetch": fetch}
+
+    return {
+        "URL": url,
+        "Final URL": page["url"],
+        "Depth": depth,
+        "Error": None,
+        "HTTP Status": page["fetch"]["status_code"],
+        "Stop Reason": page["fetch"]["stop_reason"],
+        "Findings": detect_trackers(page["scripts"], memo=memo, urls=page["resources"]),
+        "Script Hashes": sorted({script_digest(script) for script in page["scripts"]}),
+        "Links": page["links"],
+        "Fetch": page["fetch"],
+    }
+
+
+def crawl_site(url, max_depth=2, max_pages=25, max_frontier=500, max_workers=8,
+               session=None, timeout=10, memo=None):
+    """
+    Breadth-first crawl of same-origin pages starting at url. Each depth
+    level is fetched concurrently. Returns a site report combining the
+    per-page detect_trackers results with page attribution. Any object
+    with ScriptMemo's match/hit_ratio methods can serve as memo.
+    Pages that fail are reported with an "Error", except the landing
+    page: without it there is no site to report, so its error (e.g. a
+    PageFetchError for a 503) is raised. "Fetch" is the open_html info
+    of the landing page.
+    """
+    memo = memo or ScriptMemo()
+    start = normalize_url(url)
+    if start is None:
+        raise ValueError(f"Not an http(s) URL: {url}")
+
+    origin = None
+    seen = {start}
+    frontier = deque([start])
+    pages = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for depth in range(max_depth + 1):
+            batch = []
+            while frontier and len(pages) + len(batch) < max_pages:
+                batch.append(frontier.popleft())
+
+            if not batch:
+                break
+
+            results = list(pool.map(
+                lambda page_url: _scan(page_url, depth, session, timeout, memo, depth == 0),
+                batch
+            ))
+            pages.extend(results)
+
+            # The landing page may redirect (http -> https, bare -> www),
+            # so the origin is taken from where it actually ended up.
+            if origin is None:
+                origin = _origin(normalize_url(results[0].get("Final URL") or start))
+
+            frontier.clear()
+            if depth == max_depth:
+                break
+
+            for page in results:
+                for link in page.pop("Links"):
+                    link = normalize_url(link)
+                    if (
+                        link is None
+                        or link in seen
+                        or _origin(link) != origin
+                        or not _is_page_link(link)
+                    ):
+                        continue
+                    seen.add(link)
+                    if len(frontier) < max_frontier:
+                        frontier.append(link)
+
+    for page in pages:
+        page.pop("Links", None)
+    fetches = [page.pop("Fetch") for page in pages]
+
+    return {
+        "Site": start,
+        "Pages Scanned": len(pages),
+        "Findings": aggregate_findings(pages),
+        "Pages": pages,
+        "Memo Hit Ratio": round(memo.hit_ratio(), 3),
+        "Fetch": fetches[0],
+    }
+
+
+def aggregate_findings(pages):
+    """
+    Merge per-page findings into one row per tracker, keeping the union
+    of detected tags and the pages it was seen on.
+    """
+    merged = {}
+
+    for page in pages:
+        for finding in page["Findings"]:
+            row = merged.get(finding["Tracker"])
+            if row is None:
+                row = dict(finding)
+                row["Tags"] = set()
+                row["Found On"] = []
+                merged[finding["Tracker"]] = row
+
+            row["Tags"].update(finding["Detected Tags"].split(", "))
+            row["Found On"].append(page["URL"])
+
+    results = []
+    for row in merged.values():
+        row["Detected Tags"] = ", ".join(sorted(row.pop("Tags")))
+        row["Pages"] = len(row["Found On"])
+        row["Found On"] = ", ".join(row["Found On"])
+        results.append(row)
+
+    return results
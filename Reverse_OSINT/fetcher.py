@@ -0,0 +1,234 @@
+import codecs
+import time
+import zlib
+
+import requests
+from urllib3.exceptions import HTTPError as Urllib3Error
+
+try:
+    import brotli
+    # Output can only be bounded from brotli 1.2 on; older releases
+    # would inflate a whole bomb in memory, so "br" is not accepted then
+    brotli.Decompressor().process(b"", output_buffer_limit=1)
+except (ImportError, TypeError):
+    brotli = None
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+# Only advertise encodings that can be decoded incrementally below
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli else "gzip, deflate"
+
+# A page read to the end or to the byte cap shows what the site serves;
+# anything else would report trackers as missing
+SCANNABLE_STOP_REASONS = ("complete", "byte-cap")
+
+
+# --------------------------------------------------
+# Incremental Decompression
+# --------------------------------------------------
+def _decompressor(content_encoding):
+    encoding = (content_encoding or "identity").strip().lower()
+
+    if encoding in ("", "identity"):
+        return None, True
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS), True
+    if encoding == "deflate":
+        return _DeflateDecompressor(), True
+    if encoding == "br" and brotli:
+        return _BrotliDecompressor(), True
+
+    return None, False
+
+
+class _DeflateDecompressor:
+    # "deflate" is meant to be zlib-wrapped, but some servers send raw
+    # deflate streams, so fall back when the zlib header is missing.
+
+    def __init__(self):
+        self._obj = zlib.decompressobj()
+        self._started = False
+        self.unconsumed_tail = b""
+
+    def decompress(self, data, max_length):
+        if not self._started:
+            self._started = True
+            try:
+                return self._run(data, max_length)
+            except zlib.error:
+                self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._run(data, max_length)
+
+    def _run(self, data, max_length):
+        out = self._obj.decompress(data, max_length)
+        self.unconsumed_tail = self._obj.unconsumed_tail
+        return out
+
+
+class _BrotliDecompressor:
+    # Same decompress(data, max_length) / unconsumed_tail interface as
+    # zlib: input brotli could not turn into output yet stays inside it
+
+    def __init__(self):
+        self._obj = brotli.Decompressor()
+        self.unconsumed_tail = b""
+
+    def decompress(self, data, max_length):
+        out = self._obj.process(data, output_buffer_limit=max_length)
+        self.unconsumed_tail = b"" if self._obj.can_accept_more_data() else b"pending"
+        return out
+
+
+def _decode(decompressor, data, remaining):
+    """
+    Decode one wire chunk without producing much more than `remaining`
+    bytes, so a compression bomb stops at the cap instead of in memory.
+    Returns (data, cap_reached).
+    """
+    if decompressor is None:
+        return data[:remaining], len(data) > remaining
+
+    out = decompressor.decompress(data, remaining + 1)
+    cap_reached = len(out) > remaining or bool(decompressor.unconsumed_tail)
+    return out[:remaining], cap_reached
+
+
+# --------------------------------------------------
+# Fetching
+# --------------------------------------------------
+def open_html(url, session=None, timeout=10, max_bytes=MAX_PAGE_BYTES, max_seconds=None,
+              headers=None):
+    """
+    Start a streaming GET and return (info, chunks). chunks yields the
+    decoded body text, stopping at max_bytes of decompressed content or
+    after max_seconds. Responses that are not HTML are rejected from
+    their headers without reading the body. info["stop_reason"] is set
+    to one of complete, content-type, unsupported-encoding, byte-cap,
+    time-budget, decode-error or read-error once chunks is exhausted,
+    and info["elapsed"] to the seconds the request took up to then.
+    """
+    http = session or requests
+
+    request_headers = {"Accept-Encoding": ACCEPT_ENCODING}
+    request_headers.update(headers or {})
+
+    started = time.monotonic()
+    response = http.get(url, headers=request_headers, timeout=timeout, stream=True)
+
+    content_type = response.headers.get("Content-Type", "")
+    info = {
+        "url": response.url,
+        "status_code": response.status_code,
+        "content_type": content_type.split(";")[0].strip().lower(),
+        "content_encoding": response.headers.get("Content-Encoding", ""),
+        "retry_after": response.headers.get("Retry-After"),
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "bytes_read": 0,
+        "bytes_decoded": 0,
+        "stop_reason": None,
+        "error": None,
+        "elapsed": round(time.monotonic() - started, 3),
+    }
+
+    # A missing Content-Type is given the benefit of the doubt
+    if info["content_type"] and info["content_type"] not in HTML_CONTENT_TYPES:
+        info["stop_reason"] = "content-type"
+        response.close()
+        return info, _no_body()
+
+    decompressor, supported = _decompressor(info["content_encoding"])
+    if not supported:
+        info["stop_reason"] = "unsupported-encoding"
+        response.close()
+        return info, _no_body()
+
+    deadline = started + max_seconds if max_seconds else None
+
+    return info, _iter_body(response, info, decompressor, max_bytes, started, deadline)
+
+
+def _no_body():
+    yield from ()
+
+
+def _iter_body(response, info, decompressor, max_bytes, started, deadline):
+    # requests already maps text/* without a charset to ISO-8859-1;
+    # anything else is treated as UTF-8.
+    text_decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+
+    try:
+        for raw in response.raw.stream(CHUNK_SIZE, decode_content=False):
+            info["bytes_read"] += len(raw)
+
+            data, cap_reached = _decode(
+                decompressor, raw, max_bytes - info["bytes_decoded"]
+            )
+            info["bytes_decoded"] += len(data)
+            # A chunk ending exactly at the cap leaves nothing to read
+            # either: consumers stop there
+            cap_reached = cap_reached or info["bytes_decoded"] >= max_bytes
+
+            # Recorded before yielding: consumers may stop at the cap too
+            if cap_reached:
+                info["stop_reason"] = "byte-cap"
+
+            yield text_decoder.decode(data)
+
+            if cap_reached:
+                return
+
+            if deadline and time.monotonic() > deadline:
+                info["stop_reason"] = "time-budget"
+                return
+
+        info["stop_reason"] = "complete"
+        yield text_decoder.decode(b"", final=True)
+
+    except zlib.error as e:
+        info["stop_reason"], info["error"] = "decode-error", str(e)
+    except Exception as e:
+        if brotli and isinstance(e, brotli.error):
+            info["stop_reason"], info["error"] = "decode-error", str(e)
+        elif isinstance(e, (Urllib3Error, requests.RequestException, OSError)):
+            info["stop_reason"], info["error"] = "read-error", str(e)
+        else:
+            raise
+    finally:
+        info["elapsed"] = round(time.monotonic() - started, 3)
+        response.close()
+
+
+# --------------------------------------------------
+# Page Checks
+# --------------------------------------------------
+class PageFetchError(RuntimeError):
+    """
+    The server answered, but not with a page that can be scanned.
+    fetch is the open_html info of the response.
+    """
+
+    def __init__(self, message, fetch):
+        super().__init__(message)
+        self.fetch = fetch
+
+
+def check_page(fetch):
+    """
+    Raise PageFetchError unless fetch is a 2xx response read completely
+    or up to the byte cap.
+    """
+    if not 200 <= fetch["status_code"] < 300:
+        raise PageFetchError(f"HTTP {fetch['status_code']}", fetch)
+
+    if fetch["stop_reason"] not in SCANNABLE_STOP_REASONS:
+        reason = fetch["stop_reason"]
+        if reason == "content-type":
+            reason = f"content-type {fetch['content_type']}"
+        if fetch["error"]:
+            reason = f"{reason}: {fetch['error']}"
+        raise PageFetchError(f"Page not scanned ({reason})", fetch)
+
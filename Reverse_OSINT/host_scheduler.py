@@ -0,0 +1,198 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Responses that mean "slow down" rather than "broken"
+THROTTLE_STATUSES = {429, 503}
+
+
+class _HostState:
+
+    def __init__(self, rate, burst, limit):
+        self.rate = rate
+        self.tokens = burst
+        self.refilled_at = time.monotonic()
+        self.limit = limit
+        self.active = 0
+        self.not_before = 0.0
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.probing = False
+
+
+class HostScheduler:
+    """
+    Per-host politeness for bulk scans. Each host gets a token bucket
+    for request rate, an AIMD concurrency limit that grows while
+    responses are fast and healthy and halves on 429/5xx or slow
+    responses, and a circuit breaker that stops sending requests to a
+    host after repeated failures.
+    """
+
+    def __init__(self, rate=2.0, burst=4, max_rate=20.0, initial_concurrency=2,
+                 max_concurrency=8, target_latency=2.0, failure_threshold=5,
+                 cooldown=30.0, backoff_base=0.5, backoff_cap=30.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max_rate
+        self.initial_concurrency = min(initial_concurrency, max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(self.rate, self.burst, self.initial_concurrency)
+            self._hosts[host] = state
+        return state
+
+    # --------------------------------------------------
+    # Admission
+    # --------------------------------------------------
+    def acquire(self, host):
+        """
+        Try to start a request to host. Returns (decision, delay):
+        "granted" - go ahead, release() must follow;
+        "busy"    - host is at its concurrency limit, retry after a release;
+        "wait"    - retry after delay seconds (rate limit or backoff);
+        "open"    - circuit breaker is open for another delay seconds.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            state = self._state(host)
+
+            half_open = bool(state.open_until)
+            if half_open:
+                if now < state.open_until:
+                    return "open", state.open_until - now
+                # Half-open: let a single probe through
+                if state.probing or state.active:
+                    return "busy", 0.0
+
+            if now < state.not_before:
+                return "wait", state.not_before - now
+
+            if state.active >= int(state.limit):
+                return "busy", 0.0
+
+            state.tokens = min(
+                self.burst, state.tokens + (now - state.refilled_at) * state.rate
+            )
+            state.refilled_at = now
+            if state.tokens < 1:
+                return "wait", (1 - state.tokens) / state.rate
+
+            state.tokens -= 1
+            state.active += 1
+            # Only a granted request is the probe; a "wait" above must not
+            # leave the host marked as probing with nothing in flight
+            state.probing = half_open
+            return "granted", 0.0
+
+    def release(self, host, status_code=None, latency=0.0, error=False, retry_after=None):
+        """
+        Report the outcome of a granted request and adapt the host's
+        limits to it.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            state = self._state(host)
+            state.active = max(0, state.active - 1)
+
+            throttled = status_code in THROTTLE_STATUSES
+            failed = error or (status_code is not None and status_code >= 500)
+            slow = latency > self.target_latency
+
+            if throttled or failed or slow:
+                # Multiplicative decrease
+                state.limit = max(1.0, state.limit / 2)
+                if throttled:
+                    state.rate = max(self.rate / 8, state.rate / 2)
+            else:
+                # Additive increase: about +1 per window of successful requests
+                state.limit = min(self.max_concurrency, state.limit + 1 / state.limit)
+                state.rate = min(self.max_rate, state.rate + 0.1)
+
+            if retry_after:
+                state.not_before = max(state.not_before, now + retry_after)
+
+            if failed:
+                state.failures += 1
+            else:
+                state.failures = 0
+
+            if state.probing:
+                state.probing = False
+                if failed:
+                    self._trip(state, now)
+                else:
+                    state.open_until = 0.0
+                    state.trips = 0
+            elif state.failures >= self.failure_threshold:
+                self._trip(state, now)
+
+    def _trip(self, state, now):
+        # Each consecutive trip doubles the time a dead host is left alone
+        state.open_until = now + self.cooldown * 2 ** state.trips
+        state.trips += 1
+        state.failures = 0
+
+    def is_open(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            return bool(state and state.open_until and time.monotonic() < state.open_until)
+
+    # --------------------------------------------------
+    # Retries
+    # --------------------------------------------------
+    def backoff(self, attempt, retry_after=None):
+        """
+        Full-jitter exponential backoff, never shorter than Retry-After.
+        """
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                host: {
+                    "Concurrency Limit": round(state.limit, 2),
+                    "Rate": round(state.rate, 2),
+                    "Circuit Open": bool(state.open_until),
+                }
+                for host, state in self._hosts.items()
+            }
+
+
+def parse_retry_after(value):
+    """
+    Seconds to wait from a Retry-After header, which is either a delay
+    in seconds or an HTTP date. Returns None when missing or invalid.
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
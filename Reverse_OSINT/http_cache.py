@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from fetcher import check_page
+from scanner import scan_page
+from script_cache import CACHE_DIR
+from tracker_engine import detect_trackers, get_registry
+
+RESPONSE_CACHE_PATH = os.path.join(CACHE_DIR, "responses.sqlite")
+
+
+# --------------------------------------------------
+# Response Cache
+# --------------------------------------------------
+class ResponseCache:
+    """
+    SQLite store of validators and scan results per URL, with hit/miss
+    counters for the current process. Pages are streamed and only their
+    scripts kept, so no body is stored.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body_bytes INTEGER,
+                    scripts TEXT,
+                    resources TEXT,
+                    findings TEXT,
+                    registry_digest TEXT,
+                    fetched_at REAL
+                )
+            """)
+
+            # Caches created before resource URLs were stored
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+            if "resources" not in columns:
+                self._conn.execute(
+                    "ALTER TABLE responses ADD COLUMN resources TEXT NOT NULL DEFAULT '[]'"
+                )
+
+            # Caches created while page bodies were stored
+            if "body" in columns:
+                try:
+                    self._conn.execute("ALTER TABLE responses DROP COLUMN body")
+                except sqlite3.OperationalError:
+                    # SQLite before 3.35 cannot drop it; new rows leave it empty
+                    pass
+
+    def get(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body_bytes, scripts, findings, registry_digest, "
+                "resources FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "body_bytes": row[2],
+            "scripts": json.loads(row[3]),
+            "findings": json.loads(row[4]),
+            "registry_digest": row[5],
+            "resources": json.loads(row[6]),
+        }
+
+    def put(self, url, fetch, scripts, resources, findings, registry_digest):
+        # fetch is the info dict of fetcher.open_html; body_bytes is what
+        # a 304 saves on the wire
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, last_modified, body_bytes, "
+                "scripts, resources, findings, registry_digest, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    fetch["etag"],
+                    fetch["last_modified"],
+                    fetch["bytes_read"],
+                    json.dumps(scripts),
+                    json.dumps(resources),
+                    json.dumps(findings),
+                    registry_digest,
+                    time.time(),
+                )
+            )
+
+    def update_findings(self, url, findings, registry_digest):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE responses SET findings = ?, registry_digest = ?, fetched_at = ? "
+                "WHERE url = ?",
+                (json.dumps(findings), registry_digest, time.time(), url)
+            )
+
+    def record(self, hit, body_bytes=0):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.bytes_saved += body_bytes
+            else:
+                self.misses += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "Hits": self.hits,
+                "Misses": self.misses,
+                "Hit Ratio": round(self.hits / total, 3) if total else 0.0,
+                "Bytes Saved": self.bytes_saved,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --------------------------------------------------
+# Cached Scan
+# --------------------------------------------------
+def scan_with_cache(url, cache, session=None, timeout=10, external=True, memo=None):
+    """
+    Scan a website with a conditional GET. A 304 reuses the stored
+    scripts and findings; anything else is streamed through scan_page,
+    so the page is capped at MAX_PAGE_BYTES and non-HTML responses are
+    rejected unread. Returns (scripts, findings, from_cache, fetch),
+    fetch being the open_html info of the request; raises
+    PageFetchError for error statuses and pages that were not scanned.
+    """
+    url = url.strip()
+    registry = get_registry()
+    entry = cache.get(url)
+
+    headers = {}
+    if entry and entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    page = scan_page(url, session, timeout, external, headers=headers)
+    fetch = page["fetch"]
+
+    if fetch["status_code"] == 304 and entry:
+        cache.record(hit=True, body_bytes=entry["body_bytes"])
+
+        findings = entry["findings"]
+        # The page is unchanged but the tracker list may not be
+        if entry["registry_digest"] != registry["digest"]:
+            findings = detect_trackers(entry["scripts"], registry, memo, entry["resources"])
+            cache.update_findings(url, findings, registry["digest"])
+
+        return entry["scripts"], findings, True, fetch
+
+    cache.record(hit=False)
+    check_page(fetch)
+
+    scripts, resources = page["scripts"], page["resources"]
+    findings = detect_trackers(scripts, registry, memo, resources)
+    cache.put(url, fetch, scripts, resources, findings, registry["digest"])
+
+    return scripts, findings, False, fetch
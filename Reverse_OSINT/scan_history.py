@@ -0,0 +1,277 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from crawler import crawl_site, normalize_url
+from script_cache import CACHE_DIR
+from tracker_engine import match_keywords, script_digest
+
+HISTORY_PATH = os.path.join(CACHE_DIR, "history.sqlite")
+
+# Memoized script results kept; the least recently used go first
+MAX_SCRIPT_KEYWORDS = 200000
+PRUNE_EVERY = 1000
+
+
+class ScanHistory:
+    """
+    Persistent record of every site's pages, script hashes and findings.
+    It also acts as a detect_trackers memo backed by SQLite, so a rescan
+    only runs detection on scripts whose content hash is new.
+    """
+
+    def __init__(self, path=HISTORY_PATH, max_scripts=MAX_SCRIPT_KEYWORDS):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        self.max_scripts = max_scripts
+        self.hits = 0
+        self.misses = 0
+
+        # Memo keys read since the last prune, written back in one go
+        self._touched = {}
+        self._inserted = 0
+
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS scans (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    site TEXT NOT NULL,
+                    scanned_at REAL NOT NULL,
+                    findings TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS scans_site ON scans (site, id);
+
+                CREATE TABLE IF NOT EXISTS pages (
+                    site TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    script_hashes TEXT NOT NULL,
+                    trackers TEXT NOT NULL,
+                    scanned_at REAL NOT NULL,
+                    PRIMARY KEY (site, url)
+                );
+
+                CREATE TABLE IF NOT EXISTS script_keywords (
+                    key TEXT PRIMARY KEY,
+                    keywords TEXT NOT NULL,
+                    used_at REAL NOT NULL DEFAULT 0
+                );
+            """)
+
+            # Histories created before memo entries were pruned
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(script_keywords)")}
+            if "used_at" not in columns:
+                self._conn.execute(
+                    "ALTER TABLE script_keywords ADD COLUMN used_at REAL NOT NULL DEFAULT 0"
+                )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS script_keywords_used ON script_keywords (used_at)"
+            )
+
+    # --------------------------------------------------
+    # Memo interface used by detect_trackers
+    # --------------------------------------------------
+    def lookup(self, registry, script):
+        """
+        Keywords of a script and whether they came from the history.
+        """
+        key = registry["digest"] + ":" + script_digest(script)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT keywords FROM script_keywords WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self.hits += 1
+                self._touched[key] = time.time()
+                return frozenset(json.loads(row[0])), True
+            self.misses += 1
+
+        keywords = frozenset(match_keywords(registry["matcher"], script))
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO script_keywords VALUES (?, ?, ?)",
+                (key, json.dumps(sorted(keywords)), time.time())
+            )
+            self._inserted += 1
+            if self._inserted >= PRUNE_EVERY:
+                self._prune(registry["digest"])
+
+        return keywords, False
+
+    def match(self, registry, script):
+        return self.lookup(registry, script)[0]
+
+    def hit_ratio(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return self.hits / total if total else 0.0
+
+    def _prune(self, registry_digest=None):
+        # Called with the lock held, inside a transaction
+        self._conn.executemany(
+            "UPDATE script_keywords SET used_at = ? WHERE key = ?",
+            [(used_at, key) for key, used_at in self._touched.items()]
+        )
+        self._touched.clear()
+        self._inserted = 0
+
+        # Results for an older tracker list can never be hit again
+        if registry_digest:
+            self._conn.execute(
+                "DELETE FROM script_keywords WHERE substr(key, 1, ?) != ?",
+                (len(registry_digest) + 1, registry_digest + ":")
+            )
+        self._conn.execute(
+            "DELETE FROM script_keywords WHERE key IN ("
+            "SELECT key FROM script_keywords ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_scripts,)
+        )
+
+    def prune(self, registry_digest=None):
+        """
+        Drop memoized results of other tracker list versions and keep
+        only the max_scripts most recently used.
+        """
+        with self._lock, self._conn:
+            self._prune(registry_digest)
+
+    # --------------------------------------------------
+    # Scan records
+    # --------------------------------------------------
+    def last_findings(self, site):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT findings FROM scans WHERE site = ? ORDER BY id DESC LIMIT 1",
+                (site,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def record_scan(self, site, pages, findings):
+        """
+        Store a scan and return how it differs from the previous one.
+        Each page needs "URL", "Script Hashes" and "Findings".
+        """
+        previous = self.last_findings(site)
+
+        with self._lock:
+            old_pages = dict(self._conn.execute(
+                "SELECT url, script_hashes FROM pages WHERE site = ?", (site,)
+            ).fetchall())
+
+        now = time.time()
+        changed, unchanged, new = [], [], []
+
+        for page in pages:
+            if page.get("Error"):
+                continue
+            hashes = json.dumps(sorted(page.get("Script Hashes", [])))
+            if page["URL"] not in old_pages:
+                new.append(page["URL"])
+            elif old_pages[page["URL"]] == hashes:
+                unchanged.append(page["URL"])
+            else:
+                changed.append(page["URL"])
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO scans (site, scanned_at, findings) VALUES (?, ?, ?)",
+                (site, now, json.dumps(findings))
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        site,
+                        page["URL"],
+                        json.dumps(sorted(page.get("Script Hashes", []))),
+                        json.dumps(sorted(f["Tracker"] for f in page["Findings"])),
+                        now,
+                    )
+                    for page in pages
+                    if not page.get("Error")
+                ]
+            )
+
+        return diff_findings(previous, findings, changed, unchanged, new)
+
+    def close(self):
+        with self._lock:
+            with self._conn:
+                self._prune()
+            self._conn.close()
+
+
+# --------------------------------------------------
+# Diffing
+# --------------------------------------------------
+def diff_findings(previous, current, changed_pages=(), unchanged_pages=(), new_pages=()):
+    current_names = {f["Tracker"] for f in current}
+
+    if previous is None:
+        previous_names = set()
+    else:
+        previous_names = {f["Tracker"] for f in previous}
+
+    return {
+        "First Scan": previous is None,
+        "Added": sorted(current_names - previous_names),
+        "Removed": sorted(previous_names - current_names),
+        "Changed Pages": list(changed_pages),
+        "Unchanged Pages": list(unchanged_pages),
+        "New Pages": list(new_pages),
+    }
+
+
+class _ScanMemo:
+    """
+    The history as detection memo for one scan. Its own counters are
+    that scan's alone, as other scans may use the history at once.
+    """
+
+    def __init__(self, history):
+        self.history = history
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def match(self, registry, script):
+        keywords, hit = self.history.lookup(registry, script)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return keywords
+
+    def hit_ratio(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return self.hits / total if total else 0.0
+
+
+def incremental_scan(url, history, max_depth=0, max_pages=1, **crawl_options):
+    """
+    Rescan a site using the history as detection memo and return the
+    crawl report extended with a "Diff" against the previous scan.
+    With the defaults only the landing page is scanned. Raises when the
+    landing page cannot be scanned; nothing is recorded then.
+    """
+    memo = _ScanMemo(history)
+
+    # A landing page that is unreachable, throttled or not HTML raises
+    # here, before anything is recorded: recording it would show every
+    # tracker as removed
+    report = crawl_site(url, max_depth, max_pages, memo=memo, **crawl_options)
+
+    report["Diff"] = history.record_scan(
+        normalize_url(url), report["Pages"], report["Findings"]
+    )
+    report["Script Hits"] = memo.hits
+    report["Script Misses"] = memo.misses
+
+    return report
@@ -1,18 +1,196 @@
-import requests
-from bs4 import BeautifulSoup
-
-def scan_website(url):
-    url=url.strip()
-    response = requests.get(
-        url,
-        headers={"User-Agent": "Reverse-OSINT-Analyzer"},
-        timeout=10
-    )
+from contextlib import closing
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from fetcher import MAX_PAGE_BYTES, open_html
+from script_cache import fetch_external_scripts
+
+USER_AGENT = "Reverse-OSINT-Analyzer"
+
+# Only URLs the browser fetches while loading the page are evidence of
+# a tracker; an <a href> to hotjar.com is just a link
+FETCHED_SRC_TAGS = {"script", "img", "iframe", "frame", "embed", "source"}
+FETCHED_LINK_RELS = {"stylesheet", "preload", "modulepreload", "prefetch", "icon"}
+
+
+# --------------------------------------------------
+# Streaming Extraction
+# --------------------------------------------------
+class ScriptExtractor(HTMLParser):
+    """
+    Incremental parser that collects <script> contents, script src URLs,
+    <a href> links and the resource URLs the page loads (see
+    FETCHED_SRC_TAGS and FETCHED_LINK_RELS) without building a
+    document tree.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.scripts = []
+        self.sources = []
+        self.links = []
+        self.resources = []
+        self._buffer = None
+
+    def handle_starttag(self, tag, attrs):
+        self._add_resource(tag, attrs)
+
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+            return
+
+        if tag != "script":
+            return
+        self._buffer = []
+        self._add_source(attrs)
+
+    def handle_startendtag(self, tag, attrs):
+        self._add_resource(tag, attrs)
+
+        if tag == "script":
+            self.scripts.append("")
+            self._add_source(attrs)
+
+    def handle_data(self, data):
+        if self._buffer is not None:
+            self._buffer.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._buffer is not None:
+            self.scripts.append("".join(self._buffer))
+            self._buffer = None
+
+    def close(self):
+        super().close()
+        if self._buffer is not None:
+            self.scripts.append("".join(self._buffer))
+            self._buffer = None
+
+    def _add_source(self, attrs):
+        src = dict(attrs).get("src")
+        if src:
+            self.sources.append(src)
+
+    def _add_resource(self, tag, attrs):
+        attrs = dict(attrs)
+
+        if tag in FETCHED_SRC_TAGS:
+            url = attrs.get("src")
+        elif tag == "link" and FETCHED_LINK_RELS & set((attrs.get("rel") or "").lower().split()):
+            url = attrs.get("href")
+        else:
+            return
+
+        if url:
+            self.resources.append(url)
+
 
-    soup = BeautifulSoup(response.text, "html.parser")
+def iter_scripts(chunks, parser=None, max_bytes=MAX_PAGE_BYTES):
+    """
+    Feed decoded HTML chunks to a ScriptExtractor and yield each script
+    as soon as its closing tag is seen. Input past max_bytes is ignored.
+    """
+    parser = parser or ScriptExtractor()
+    emitted = 0
+    size = 0
 
-    scripts = []
-    for script in soup.find_all("script"):
-        scripts.append(script.get_text())
+    for chunk in chunks:
+        if size + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - size]
+        size += len(chunk)
 
+        parser.feed(chunk)
+        while emitted < len(parser.scripts):
+            yield parser.scripts[emitted]
+            emitted += 1
+
+        if size >= max_bytes:
+            break
+
+    parser.close()
+    while emitted < len(parser.scripts):
+        yield parser.scripts[emitted]
+        emitted += 1
+
+
+# --------------------------------------------------
+# Scanning
+# --------------------------------------------------
+def _script_sources(sources, base_url):
+    resolved = []
+    for src in sources:
+        if not src.strip():
+            continue
+        src = urljoin(base_url, src.strip())
+        if urlsplit(src).scheme in ("http", "https") and src not in resolved:
+            resolved.append(src)
+    return resolved
+
+
+def resource_urls(resources, base_url):
+    resolved = set()
+    for resource in resources:
+        resource = urljoin(base_url, resource.strip())
+        if urlsplit(resource).scheme in ("http", "https"):
+            resolved.add(resource)
+    return sorted(resolved)
+
+
+def add_external_scripts(scripts, sources, base_url, session=None, timeout=10):
+    # Most trackers are loaded through <script src=...>, so the
+    # referenced files are scanned alongside the inline code.
+    scripts.extend(
+        fetch_external_scripts(
+            _script_sources(sources, base_url),
+            session,
+            timeout,
+            headers={"User-Agent": USER_AGENT}
+        )
+    )
     return scripts
+
+
+def scan_page(url, session=None, timeout=10, external=True, max_bytes=MAX_PAGE_BYTES,
+              max_seconds=None, headers=None):
+    """
+    Stream one page and return its final URL, scripts, outgoing links,
+    the resource URLs referenced by src/href attributes and the fetch
+    info recording how much was read and why reading stopped.
+    The body is read in chunks and only script text is kept, so page
+    size is bounded by max_bytes rather than the response length.
+    headers are sent along, e.g. for conditional requests.
+    """
+    request_headers = {"User-Agent": USER_AGENT}
+    request_headers.update(headers or {})
+
+    info, chunks = open_html(
+        url.strip(),
+        session,
+        timeout,
+        max_bytes,
+        max_seconds,
+        headers=request_headers
+    )
+
+    parser = ScriptExtractor()
+    with closing(chunks):
+        scripts = list(iter_scripts(chunks, parser, max_bytes))
+
+    if external:
+        add_external_scripts(scripts, parser.sources, info["url"], session, timeout)
+
+    links = [urljoin(info["url"], link.strip()) for link in parser.links]
+
+    return {
+        "url": info["url"],
+        "scripts": scripts,
+        "links": links,
+        "resources": resource_urls(parser.resources, info["url"]),
+        "fetch": info,
+    }
+
+
+def scan_website(url, session=None, timeout=10, external=True, max_bytes=MAX_PAGE_BYTES):
+    return scan_page(url, session, timeout, external, max_bytes)["scripts"]
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+CACHE_DIR = os.environ.get(
+    "REVERSE_OSINT_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "reverse_osint")
+)
+
+MAX_SCRIPT_BYTES = 2 * 1024 * 1024
+MAX_AGE_SECONDS = 24 * 60 * 60
+
+# Striped per-URL locks: a fixed number however many URLs a run sees,
+# at the cost of two unrelated URLs now and then waiting on each other
+URL_LOCK_STRIPES = 256
+_url_locks = [threading.Lock() for _ in range(URL_LOCK_STRIPES)]
+
+# One download pool for every page scan, so the workers of a bulk run
+# share its threads instead of each starting their own
+FETCH_WORKERS = int(os.environ.get("REVERSE_OSINT_FETCH_WORKERS", 16))
+_fetch_pool = None
+_fetch_pool_guard = threading.Lock()
+
+
+# --------------------------------------------------
+# On-disk Store
+# --------------------------------------------------
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _object_path(cache_dir, digest):
+    return os.path.join(cache_dir, "scripts", "objects", digest[:2], digest)
+
+
+def _index_path(cache_dir, url):
+    return os.path.join(cache_dir, "scripts", "index", _sha256(url.encode("utf-8")) + ".json")
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read_entry(cache_dir, url):
+    try:
+        with open(_index_path(cache_dir, url), encoding="utf-8") as f:
+            entry = json.load(f)
+        with open(_object_path(cache_dir, entry["sha256"]), "rb") as f:
+            return entry, f.read()
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def _store(cache_dir, url, etag, body):
+    digest = _sha256(body)
+    object_path = _object_path(cache_dir, digest)
+
+    # Identical bundles served from different URLs share one object
+    if not os.path.exists(object_path):
+        _write_atomic(object_path, body)
+
+    entry = {"url": url, "etag": etag, "sha256": digest, "fetched_at": time.time()}
+    _write_atomic(_index_path(cache_dir, url), json.dumps(entry).encode("utf-8"))
+
+    return entry
+
+
+def _url_lock(url):
+    return _url_locks[hash(url) % URL_LOCK_STRIPES]
+
+
+def _fetch_executor():
+    global _fetch_pool
+    with _fetch_pool_guard:
+        if _fetch_pool is None:
+            _fetch_pool = ThreadPoolExecutor(
+                max_workers=FETCH_WORKERS, thread_name_prefix="script-fetch"
+            )
+        return _fetch_pool
+
+
+# --------------------------------------------------
+# Fetching
+# --------------------------------------------------
+def fetch_script(url, session=None, timeout=10, max_bytes=MAX_SCRIPT_BYTES,
+                 max_age=MAX_AGE_SECONDS, cache_dir=CACHE_DIR, headers=None):
+    """
+    Return the text of an external script, downloading it only when the
+    cached copy is missing, stale and not confirmed by a 304.
+    Bodies larger than max_bytes are truncated at the cap.
+    """
+    http = session or requests
+
+    # Concurrent scans of sites sharing a CDN bundle wait for the first
+    # download instead of fetching the same URL in parallel.
+    with _url_lock(url):
+        entry, body = _read_entry(cache_dir, url)
+
+        if entry and time.time() - entry["fetched_at"] < max_age:
+            return body.decode("utf-8", errors="replace")
+
+        headers = dict(headers or {})
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+
+        with http.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            if response.status_code == 304 and entry:
+                _store(cache_dir, url, entry["etag"], body)
+                return body.decode("utf-8", errors="replace")
+
+            response.raise_for_status()
+
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes:
+                    break
+
+            body = b"".join(chunks)[:max_bytes]
+            _store(cache_dir, url, response.headers.get("ETag"), body)
+
+        return body.decode("utf-8", errors="replace")
+
+
+def fetch_external_scripts(urls, session=None, timeout=10,
+                           max_bytes=MAX_SCRIPT_BYTES, cache_dir=CACHE_DIR, headers=None):
+    """
+    Fetch external scripts in parallel on the shared download pool.
+    Scripts that fail to download are skipped so one broken tag does
+    not hide the rest of the page.
+    """
+    def fetch(url):
+        try:
+            return fetch_script(
+                url, session, timeout, max_bytes, cache_dir=cache_dir, headers=headers
+            )
+        except (requests.RequestException, OSError):
+            return None
+
+    if not urls:
+        return []
+
+    return [text for text in _fetch_executor().map(fetch, urls) if text is not None]
@@ -1,3 +1,9 @@
+import numpy as np
+import pandas as pd
+
+from tracker_engine import get_registry, tracker_display_name, tracker_risk_weight
+
+
 def analyze_surveillance(trackers):
     confidence = 0
     categories = set()
@@ -23,3 +29,86 @@ def analyze_surveillance(trackers):
         level = "GREEN"
 
     return confidence, level
+
+
+# --------------------------------------------------
+# Batch Scoring
+# --------------------------------------------------
+def findings_table(site_findings):
+    """
+    Flatten {site: detect_trackers() rows} into one row per
+    (site, tracker) with Site, Tracker, Category and Risk Weight columns.
+    """
+    sites = []
+    trackers = []
+    categories = []
+    weights = []
+
+    for site, findings in site_findings.items():
+        for finding in findings:
+            sites.append(site)
+            trackers.append(finding["Tracker"])
+            categories.append(finding["Category"])
+            weights.append(finding.get("Risk Weight", np.nan))
+
+    return pd.DataFrame({
+        "Site": sites,
+        "Tracker": trackers,
+        "Category": categories,
+        "Risk Weight": pd.array(weights, dtype="float64"),
+    })
+
+
+def score_sites(findings, sites=None, registry=None):
+    """
+    Apply the analyze_surveillance rules to every site of a findings
+    table at once. Missing risk weights are filled from the tracker
+    database. Sites listed in `sites` without findings score GREEN.
+    """
+    registry = registry or get_registry()
+
+    weight_by_tracker = pd.Series({
+        tracker_display_name(tracker): tracker_risk_weight(info)
+        for tracker, info in registry["tracker_db"].items()
+    }, dtype="float64")
+
+    weights = findings["Risk Weight"] if "Risk Weight" in findings else pd.Series(
+        np.nan, index=findings.index, dtype="float64"
+    )
+    weights = weights.fillna(findings["Tracker"].map(weight_by_tracker)).fillna(0)
+
+    confidence = weights.groupby(findings["Site"]).sum()
+    tracker_count = findings.groupby("Site").size()
+
+    present = (
+        findings.groupby(["Site", "Category"]).size().unstack(fill_value=0) > 0
+    )
+    category_count = present.sum(axis=1)
+
+    advertising = present["Advertising"] if "Advertising" in present else False
+    analytics = present["Analytics"] if "Analytics" in present else False
+
+    confidence = (
+        confidence
+        + 20 * (advertising & analytics)
+        + 20 * (category_count >= 3)
+    )
+
+    scores = pd.DataFrame({
+        "Trackers": tracker_count,
+        "Categories": category_count,
+        "Confidence": confidence,
+    })
+
+    if sites is not None:
+        scores = scores.reindex(pd.Index(sites, name="Site"), fill_value=0)
+
+    scores = scores.astype({"Trackers": "int64", "Categories": "int64"})
+    scores["Confidence"] = scores["Confidence"].clip(upper=100).astype("int64")
+    scores["Level"] = np.select(
+        [scores["Confidence"] >= 70, scores["Confidence"] >= 40],
+        ["RED", "ORANGE"],
+        default="GREEN"
+    )
+
+    return scores
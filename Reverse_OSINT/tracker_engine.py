@@ -1,26 +1,392 @@
+import hashlib
 import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
 
-def detect_trackers(scripts):
-    with open("tracker_list.json") as f:
-        tracker_db = json.load(f)
+from tracker_index import open_index
 
-    results = []
+TRACKER_DB_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "tracker_list.json"
+)
 
-    for tracker, info in tracker_db.items():
-        detected_tags = set()
+# Optional compiled blocklist index, built by tracker_index.py
+TRACKER_INDEX_PATH = os.environ.get(
+    "REVERSE_OSINT_TRACKER_INDEX",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "tracker_index.bin")
+)
+
+# Used for tracker entries that do not declare their own risk_weight
+DEFAULT_RISK_WEIGHTS = {
+    "Analytics": 10,
+    "Advertising": 20,
+    "Session Replay": 30,
+}
+
+# Below this many keywords a plain substring scan beats the compiled
+# trie regex (see benchmark_tracker_engine.py); the bundled list is here
+SUBSTRING_SCAN_BELOW = 100
+
+
+# --------------------------------------------------
+# Keyword Matcher
+# --------------------------------------------------
+def _build_trie(keywords):
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+    return trie
+
+
+def _trie_pattern(node):
+    # Factor the keywords into a prefix trie so the regex engine walks
+    # shared prefixes once instead of trying every alternative in turn.
+    terminal = "" in node
+    branches = [
+        re.escape(char) + _trie_pattern(child)
+        for char, child in sorted(node.items())
+        if char
+    ]
+
+    if not branches:
+        return ""
+
+    if len(branches) == 1 and not terminal:
+        return branches[0]
 
+    body = "(?:" + "|".join(branches) + ")"
+    return body + "?" if terminal else body
+
+
+def _contained_keywords(trie, keyword):
+    contained = set()
+    for start in range(len(keyword)):
+        node = trie
+        for end in range(start, len(keyword)):
+            node = node.get(keyword[end])
+            if node is None:
+                break
+            if "" in node:
+                contained.add(keyword[start:end + 1])
+    return contained
+
+
+def build_matcher(tracker_db):
+    """
+    Compile every keyword of the tracker database into one regex
+    that is evaluated in a single pass over each script. Short lists
+    are scanned keyword by keyword instead, which is faster for them.
+    """
+    keyword_trackers = {}
+    for tracker, info in tracker_db.items():
         for keyword in info["keywords"]:
-            for script in scripts:
-                if keyword in script:
-                    detected_tags.add(keyword)
+            if keyword:
+                keyword_trackers.setdefault(keyword, []).append(tracker)
+
+    if len(keyword_trackers) < SUBSTRING_SCAN_BELOW:
+        return {
+            "pattern": None,
+            "keywords": list(keyword_trackers),
+            "implied": {},
+            "keyword_trackers": keyword_trackers,
+        }
+
+    trie = _build_trie(keyword_trackers)
+
+    # A search reports only the longest keyword starting at its position,
+    # so keywords contained in a hit are implied matches.
+    implied = {
+        keyword: _contained_keywords(trie, keyword)
+        for keyword in keyword_trackers
+    }
+
+    pattern = None
+    if keyword_trackers:
+        pattern = re.compile(_trie_pattern(trie))
+
+    return {
+        "pattern": pattern,
+        "keywords": None,
+        "implied": implied,
+        "keyword_trackers": keyword_trackers,
+    }
+
+
+def match_keywords(matcher, script):
+    if not script:
+        return set()
+
+    if matcher["keywords"] is not None:
+        return {keyword for keyword in matcher["keywords"] if keyword in script}
+
+    pattern = matcher["pattern"]
+    if pattern is None:
+        return set()
+
+    hits = set()
+    match = pattern.search(script)
+    while match:
+        hits.add(match.group())
+        # Restart one character after the hit so overlapping keywords
+        # are still reported.
+        match = pattern.search(script, match.start() + 1)
+
+    found = set()
+    for keyword in hits:
+        found |= matcher["implied"][keyword]
+
+    return found
+
+
+# --------------------------------------------------
+# Domain Suffix Index
+# --------------------------------------------------
+def build_domain_index(tracker_db):
+    """
+    Build a trie keyed by reversed host labels (com -> google-analytics),
+    so a host is classified by walking its labels once.
+    """
+    root = {}
+    for tracker, info in tracker_db.items():
+        for domain in info.get("domains", []):
+            node = root
+            for label in reversed(domain.lower().strip(".").split(".")):
+                node = node.setdefault(label, {})
+            node.setdefault("", []).append((tracker, domain))
+    return root
+
+
+def classify_host(domain_index, host):
+    """
+    Return the (tracker, domain) pairs of the most specific tracker
+    domain that host equals or is a subdomain of.
+    """
+    node = domain_index
+    match = []
+
+    for label in reversed(host.lower().rstrip(".").split(".")):
+        node = node.get(label)
+        if node is None:
+            break
+        if "" in node:
+            match = node[""]
+
+    return match
+
+
+def classify_url(domain_index, url):
+    host = urlsplit(url).hostname
+    return classify_host(domain_index, host) if host else []
+
+
+# --------------------------------------------------
+# Tracker Entries
+# --------------------------------------------------
+def tracker_display_name(tracker):
+    return tracker.replace("_", " ").title()
+
+
+def tracker_risk_weight(info):
+    return info.get("risk_weight", DEFAULT_RISK_WEIGHTS.get(info["category"], 10))
+
+
+# --------------------------------------------------
+# Tracker Registry
+# --------------------------------------------------
+_registry = {
+    "path": None,
+    "stat": None,
+    "snapshot": None,
+}
+_registry_lock = threading.Lock()
+
+
+def get_registry(path=None):
+    """
+    Return the parsed tracker database and its compiled matcher.
+    The file is re-read only when its mtime or size changes, and the
+    lookup structures are rebuilt only when its content hash changes.
+    """
+    path = os.path.abspath(path or TRACKER_DB_PATH)
+    st = os.stat(path)
+    stat_key = (st.st_mtime_ns, st.st_size)
+
+    with _registry_lock:
+        snapshot = _registry["snapshot"]
+        if _registry["path"] == path and _registry["stat"] == stat_key:
+            return snapshot
+
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        if snapshot is None or snapshot["path"] != path or snapshot["digest"] != digest:
+            tracker_db = json.loads(raw)
+            # Readers hold on to the old snapshot, so it is replaced
+            # as a whole rather than updated in place.
+            snapshot = {
+                "path": path,
+                "digest": digest,
+                "tracker_db": tracker_db,
+                "matcher": build_matcher(tracker_db),
+                "domain_index": build_domain_index(tracker_db),
+            }
+
+        _registry["path"] = path
+        _registry["stat"] = stat_key
+        _registry["snapshot"] = snapshot
+
+        return snapshot
+
+
+# --------------------------------------------------
+# Script Memoization
+# --------------------------------------------------
+def script_digest(script):
+    return hashlib.blake2b(
+        script.encode("utf-8", errors="surrogatepass"), digest_size=16
+    ).hexdigest()
+
+
+class ScriptMemo:
+    """
+    Bounded LRU mapping a script's content hash to the keywords found in
+    it, so identical snippets shared across sites are scanned once.
+    Keys include the tracker database digest, so edits to the list
+    never serve stale matches.
+    """
+
+    def __init__(self, max_entries=50000, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for key, keywords in json.load(f).items():
+                    self._entries[key] = frozenset(keywords)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def match(self, registry, script):
+        key = registry["digest"] + ":" + script_digest(script)
+
+        with self._lock:
+            keywords = self._entries.get(key)
+            if keywords is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return keywords
+            self.misses += 1
+
+        keywords = frozenset(match_keywords(registry["matcher"], script))
+
+        with self._lock:
+            self._entries[key] = keywords
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return keywords
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+
+        with self._lock:
+            data = {key: sorted(keywords) for key, keywords in self._entries.items()}
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+
+# --------------------------------------------------
+# Detection
+# --------------------------------------------------
+def detect_trackers(scripts, registry=None, memo=None, urls=(), index=None):
+    """
+    Match tracker keywords in script bodies and tracker domains in the
+    hosts of resource URLs the page loads (script src, stylesheets,
+    iframes, pixels; not plain <a href> links). Both
+    kinds of evidence are merged into one row per tracker. Hosts unknown
+    to tracker_list.json are looked up in the compiled blocklist index
+    when one is installed.
+    """
+    registry = registry or get_registry()
+    tracker_db = registry["tracker_db"]
+    matcher = registry["matcher"]
+
+    detected = {}
+    for script in scripts:
+        if memo is not None:
+            keywords = memo.match(registry, script)
+        else:
+            keywords = match_keywords(matcher, script)
+
+        for keyword in keywords:
+            for tracker in matcher["keyword_trackers"][keyword]:
+                detected.setdefault(tracker, set()).add(keyword)
+
+    domain_index = registry["domain_index"]
+    unmatched_hosts = set()
+    for url in set(urls):
+        matches = classify_url(domain_index, url)
+        for tracker, domain in matches:
+            detected.setdefault(tracker, set()).add(domain)
+        if not matches and urlsplit(url).hostname:
+            unmatched_hosts.add(urlsplit(url).hostname)
+
+    index = index or open_index(TRACKER_INDEX_PATH)
+    listed = {}
+    if index is not None:
+        for host in unmatched_hosts:
+            entry = index.lookup_host(host)
+            if entry:
+                key = (entry["company"], entry["category"])
+                listed.setdefault(key, {"entry": entry, "domains": set()})
+                listed[key]["domains"].add(entry["domain"])
+
+    results = []
+
+    for tracker, info in tracker_db.items():
+        detected_tags = detected.get(tracker)
 
         if detected_tags:
             results.append({
-                "Tracker": tracker.replace("_", " ").title(),
+                "Tracker": tracker_display_name(tracker),
                 "Company": info["company"],
                 "Category": info["category"],
                 "Detected Tags": ", ".join(sorted(detected_tags)),
+                "Risk Weight": tracker_risk_weight(info),
                 "Description": info["description"]
             })
 
+    for (company, category), match in sorted(listed.items()):
+        results.append({
+            "Tracker": company,
+            "Company": company,
+            "Category": category,
+            "Detected Tags": ", ".join(sorted(match["domains"])),
+            "Risk Weight": match["entry"]["risk_weight"],
+            "Description": f"Domain listed as {category} by an imported tracker blocklist."
+        })
+
     return results
@@ -0,0 +1,306 @@
+import argparse
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+
+# --------------------------------------------------
+# Binary Layout (little endian)
+# --------------------------------------------------
+# header   magic, version, entry count, domain count,
+#          entries offset, domains offset, strings offset
+# domains  (u64 domain hash, u32 entry number, u32 domain string offset),
+#          sorted by hash
+# entries  (u32 company offset, u32 category offset, u16 risk weight, u16 pad)
+# strings  u16 length-prefixed UTF-8
+MAGIC = b"ROTI"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHIIIII")
+DOMAIN = struct.Struct("<QII")
+ENTRY = struct.Struct("<IIHH")
+STRING_LENGTH = struct.Struct("<H")
+
+EASYLIST_DOMAIN_RULE = re.compile(r"^\|\|([a-z0-9.-]+)\^(?:\$(.*))?$")
+
+
+def domain_hash(domain):
+    return int.from_bytes(
+        hashlib.blake2b(domain.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+# --------------------------------------------------
+# Blocklist Parsers
+# --------------------------------------------------
+def parse_easylist(path, category="Tracking", risk_weight=10):
+    """
+    Read domain-anchored rules (||example.com^) from an Adblock Plus
+    style list such as EasyPrivacy. Rules with paths, exceptions and
+    cosmetic filters cannot be expressed as a host lookup and are skipped.
+    """
+    records = []
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            match = EASYLIST_DOMAIN_RULE.match(line.strip().lower())
+            if not match:
+                continue
+
+            options = match.group(2) or ""
+            # Rules limited to particular first-party domains are not global
+            if "domain=" in options:
+                continue
+
+            domain = match.group(1).strip(".")
+            records.append((domain, domain, category, risk_weight))
+
+    return records
+
+
+def parse_disconnect(path, risk_weights=None, default_weight=10):
+    """
+    Read Disconnect's services.json: categories -> companies -> domains.
+    """
+    risk_weights = risk_weights or {}
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    records = []
+    for category, companies in data.get("categories", {}).items():
+        weight = risk_weights.get(category, default_weight)
+
+        for company_entry in companies:
+            for company, sites in company_entry.items():
+                for domains in sites.values():
+                    if not isinstance(domains, list):
+                        continue
+                    for domain in domains:
+                        records.append((domain.lower().strip("."), company, category, weight))
+
+    return records
+
+
+def parse_tracker_list(path, risk_weights=None, default_weight=10):
+    """
+    Read the domains of the bundled tracker_list.json format.
+    """
+    risk_weights = risk_weights or {}
+
+    with open(path, encoding="utf-8") as f:
+        tracker_db = json.load(f)
+
+    records = []
+    for info in tracker_db.values():
+        weight = info.get("risk_weight", risk_weights.get(info["category"], default_weight))
+        for domain in info.get("domains", []):
+            records.append((domain.lower().strip("."), info["company"], info["category"], weight))
+
+    return records
+
+
+# --------------------------------------------------
+# Compiler
+# --------------------------------------------------
+def compile_index(records, output_path):
+    """
+    Write (domain, company, category, risk weight) records to a binary
+    index. Later records for the same domain replace earlier ones.
+    Returns the number of domains written.
+    """
+    strings = bytearray()
+    string_offsets = {}
+
+    def intern(text):
+        if text not in string_offsets:
+            encoded = text.encode("utf-8")[:0xFFFF]
+            string_offsets[text] = len(strings)
+            strings.extend(STRING_LENGTH.pack(len(encoded)))
+            strings.extend(encoded)
+        return string_offsets[text]
+
+    entry_numbers = {}
+    entries = []
+    by_domain = {}
+
+    for domain, company, category, weight in records:
+        if not domain:
+            continue
+
+        key = (company, category, int(weight))
+        if key not in entry_numbers:
+            entry_numbers[key] = len(entries)
+            entries.append(ENTRY.pack(intern(company), intern(category), min(int(weight), 0xFFFF), 0))
+
+        by_domain[domain] = entry_numbers[key]
+
+    domains = sorted(
+        (domain_hash(domain), number, intern(domain))
+        for domain, number in by_domain.items()
+    )
+
+    entries_offset = HEADER.size
+    domains_offset = entries_offset + len(entries) * ENTRY.size
+    strings_offset = domains_offset + len(domains) * DOMAIN.size
+
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, 0, len(entries), len(domains),
+            entries_offset, domains_offset, strings_offset
+        ))
+        f.writelines(entries)
+        f.writelines(DOMAIN.pack(*record) for record in domains)
+        f.write(strings)
+    os.replace(tmp_path, output_path)
+
+    return len(domains)
+
+
+# --------------------------------------------------
+# Reader
+# --------------------------------------------------
+class TrackerIndex:
+    """
+    Read-only view of a compiled index through mmap. Nothing is parsed up
+    front, so opening is constant time and every worker process maps
+    the same page-cache copy of the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, _, self.entry_count, self.domain_count,
+         self._entries, self._domains, self._strings) = HEADER.unpack_from(self._map, 0)
+
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {VERSION} tracker index")
+
+    def __len__(self):
+        return self.domain_count
+
+    def _string(self, offset):
+        start = self._strings + offset
+        (length,) = STRING_LENGTH.unpack_from(self._map, start)
+        start += STRING_LENGTH.size
+        return self._map[start:start + length].decode("utf-8")
+
+    def _domain_record(self, position):
+        return DOMAIN.unpack_from(self._map, self._domains + position * DOMAIN.size)
+
+    def _find(self, domain):
+        target = domain_hash(domain)
+        position = bisect.bisect_left(
+            range(self.domain_count), target, key=lambda i: self._domain_record(i)[0]
+        )
+
+        # Hash collisions are resolved by comparing the stored domain
+        while position < self.domain_count:
+            hashed, number, domain_offset = self._domain_record(position)
+            if hashed != target:
+                return None
+            if self._string(domain_offset) == domain:
+                return number
+            position += 1
+
+        return None
+
+    def lookup_host(self, host):
+        """
+        Return the entry for the most specific listed suffix of host,
+        or None when no suffix is listed.
+        """
+        labels = host.lower().rstrip(".").split(".")
+
+        for start in range(len(labels) - 1):
+            domain = ".".join(labels[start:])
+            number = self._find(domain)
+            if number is None:
+                continue
+
+            company, category, weight, _ = ENTRY.unpack_from(
+                self._map, self._entries + number * ENTRY.size
+            )
+            return {
+                "domain": domain,
+                "company": self._string(company),
+                "category": self._string(category),
+                "risk_weight": weight,
+            }
+
+        return None
+
+    def close(self):
+        self._map.close()
+
+
+_open_indexes = {}
+_open_indexes_lock = threading.Lock()
+
+
+def open_index(path):
+    """
+    Return a shared TrackerIndex for path, reopened when the file is
+    replaced by a new compile. Returns None when the file is missing.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    with _open_indexes_lock:
+        cached = _open_indexes.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        index = TrackerIndex(path)
+        _open_indexes[path] = (key, index)
+        return index
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+def main():
+    from tracker_engine import DEFAULT_RISK_WEIGHTS, TRACKER_DB_PATH, TRACKER_INDEX_PATH
+
+    parser = argparse.ArgumentParser(
+        description="Compile third-party tracker blocklists into a binary tracker index."
+    )
+    parser.add_argument("--easylist", nargs="*", default=[],
+                        help="Adblock Plus style lists, e.g. easyprivacy.txt")
+    parser.add_argument("--easylist-category", default="Tracking")
+    parser.add_argument("--disconnect", nargs="*", default=[],
+                        help="Disconnect services.json files")
+    parser.add_argument("--no-tracker-list", action="store_true",
+                        help=f"Do not include the domains of {os.path.basename(TRACKER_DB_PATH)}")
+    parser.add_argument("-o", "--output", default=TRACKER_INDEX_PATH)
+    args = parser.parse_args()
+
+    records = []
+    for path in args.easylist:
+        weight = DEFAULT_RISK_WEIGHTS.get(args.easylist_category, 10)
+        records.extend(parse_easylist(path, args.easylist_category, weight))
+    for path in args.disconnect:
+        records.extend(parse_disconnect(path, DEFAULT_RISK_WEIGHTS))
+    # The curated list is applied last so its entries win over imports
+    if not args.no_tracker_list:
+        records.extend(parse_tracker_list(TRACKER_DB_PATH, DEFAULT_RISK_WEIGHTS))
+
+    count = compile_index(records, args.output)
+    size = os.path.getsize(args.output)
+    print(f"Wrote {count} domains ({size:,} bytes) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from selenium.common.exceptions import TimeoutException, UnexpectedAlertPresentException
+
+from dom_wait import timings, wait_for_js
+from exif_reader import has_metadata, read_metadata
+from result_cache import fingerprint
+from upload_staging import normalize_image, remove_quietly
+
+PI7_URL = "https://image.pi7.org/photo-metadata-viewer"
+IMAGEDETECT_URL = "https://aiimagechecker.net/imagedetect"
+GEOSPY_URL = "https://aiimagechecker.net/geospy"
+
+TARGET_SECTIONS = {
+    "PRIMARY IMAGE TAGS": "t_0th",
+    "CAMERA & PHOTO DETAILS": "t_Exif",
+    "GEOLOCATION INFO (GPS)": "t_GPS"
+}
+
+EXTRACT_JS = """
+var sectionId = arguments[0];
+var data = [];
+var container = document.getElementById(sectionId);
+if (container) {
+    var labels = container.querySelectorAll('label');
+    for (var i = 0; i < labels.length; i++) {
+        var input = labels[i].querySelector('input');
+        if (input && input.value && input.value.trim() !== "") {
+            var labelText = labels[i].innerText.replace(input.value, "").trim();
+            data.push(labelText + ": " + input.value.trim());
+        }
+    }
+}
+return data;
+"""
+
+PI7_INPUT_JS = """
+return document.getElementById('files');
+"""
+
+PI7_EDITOR_JS = """
+return document.getElementById('metaeditorx') ? true : null;
+"""
+
+# pi7 fills the tag inputs after the editor appears; images without
+# metadata never get values, so this wait is kept short.
+PI7_VALUES_JS = """
+var inputs = document.querySelectorAll('#t_0th input, #t_Exif input, #t_GPS input');
+for (var i = 0; i < inputs.length; i++) {
+    if (inputs[i].value && inputs[i].value.trim() !== "") return true;
+}
+return null;
+"""
+
+# The upload inputs are hidden, so they are looked up from script
+FILE_INPUT_JS = """
+const input = document.querySelector('input[type="file"]');
+if (!input) return null;
+input.value = null;
+return input;
+"""
+
+POLL_CONTENT_JS = """
+const el = document.querySelector(
+    'div.whitespace-pre-wrap.font-mono.text-sm.bg-gray-50.p-4.rounded-lg'
+);
+if (!el) return null;
+return el.innerText.trim().length > 50 ? el.innerText.trim() : null;
+"""
+
+POLL_GEO_JS = """
+const blocks = document.querySelectorAll(
+  'section[aria-label="Photo Analysis Tool"] div.grid.grid-cols-1.md\\\\:grid-cols-2.gap-6 > div'
+);
+
+if (!blocks || blocks.length < 1) return null;
+
+let output = [];
+blocks.forEach(b => {
+    const txt = b.innerText.trim();
+    if (txt.length > 20) output.push(txt);
+});
+
+const mapLink = document.querySelector(
+  'section[aria-label="Photo Analysis Tool"] a[href*="google.com/maps"]'
+);
+
+return {
+    blocks: output,
+    map: mapLink ? mapLink.href : null
+};
+"""
+
+# Upload to pi7 when Pillow finds no metadata (e.g. formats it cannot parse)
+REMOTE_METADATA = os.environ.get("IMAGE_CHECKER_REMOTE_METADATA") == "1"
+
+PAGE_TIMEOUT = 20
+RESULT_TIMEOUT = 30
+METADATA_SETTLE_TIMEOUT = 3
+
+# Upper bound for each phase, including the wait for a pooled driver
+PHASE_TIMEOUTS = {
+    "pi7": 60,
+    "ai_content": 75,
+    "geospy": 75,
+}
+
+
+def empty_results():
+    return {
+        "pi7": [],
+        "ai_content": "",
+        "geospy": [],
+        "map_url": None,  # ✅ MAP LINK
+        "gps": None,
+        "upload": None,
+        "result_seconds": {},
+        "errors": {}
+    }
+
+
+def _wait_for(driver, script, timeout, label, what):
+    found = wait_for_js(driver, script, timeout=timeout, label=label)
+    if not found:
+        raise TimeoutException(f"Timed out waiting for {what}")
+    return found
+
+
+def _upload(driver, img_path, phase, result_js):
+    """
+    Hand img_path to the page's upload form and wait for result_js.
+    send_keys only passes the path to the input and the page uploads
+    the file afterwards, so the time measured is from handing over the
+    file until its result shows: upload plus the site's processing.
+    Returns (result, seconds), seconds being None when no result came.
+    """
+    file_input = _wait_for(driver, FILE_INPUT_JS, PAGE_TIMEOUT, f"{phase} page", "the upload form")
+
+    start = time.monotonic()
+    file_input.send_keys(img_path)
+    result = wait_for_js(driver, result_js, timeout=RESULT_TIMEOUT, label=f"{phase} result")
+    if not result:
+        return None, None
+
+    seconds = time.monotonic() - start
+    timings.record(f"{phase} to result", seconds)
+    return result, round(seconds, 2)
+
+
+# ============================================================
+# PHASES
+# ============================================================
+def phase_metadata(driver, img_path):
+    """
+    PHASE 1 (remote fallback) - EXIF sections as read by image.pi7.org.
+    """
+    driver.get(PI7_URL)
+    upload_input = _wait_for(driver, PI7_INPUT_JS, PAGE_TIMEOUT, "pi7 page", "the upload form")
+    try:
+        start = time.monotonic()
+        upload_input.send_keys(img_path)
+    except UnexpectedAlertPresentException:
+        # pi7 rejects some files with an alert instead of a page
+        driver.switch_to.alert.accept()
+        return {"pi7": [{"title": title, "data": []} for title in TARGET_SECTIONS]}
+
+    # The editor opens once pi7 has received and parsed the file
+    _wait_for(driver, PI7_EDITOR_JS, PAGE_TIMEOUT, "pi7 editor", "the metadata editor")
+    seconds = time.monotonic() - start
+    timings.record("pi7 to result", seconds)
+
+    wait_for_js(driver, PI7_VALUES_JS, timeout=METADATA_SETTLE_TIMEOUT, label="pi7 values")
+
+    return {
+        "pi7": [
+            {"title": title, "data": driver.execute_script(EXTRACT_JS, section_id)}
+            for title, section_id in TARGET_SECTIONS.items()
+        ],
+        "result_seconds": {"pi7": round(seconds, 2)},
+    }
+
+
+def phase_content(driver, img_path):
+    """
+    PHASE 2 - image content description from aiimagechecker.
+    """
+    driver.get(IMAGEDETECT_URL)
+    text, seconds = _upload(driver, img_path, "ai_content", POLL_CONTENT_JS)
+
+    return {"ai_content": text or "", "result_seconds": {"ai_content": seconds}}
+
+
+def phase_geolocation(driver, img_path):
+    """
+    PHASE 3 - GeoSpy location cards and map link.
+    """
+    driver.get(GEOSPY_URL)
+    geo_data, seconds = _upload(driver, img_path, "geospy", POLL_GEO_JS)
+
+    if not geo_data:
+        return {"geospy": [], "map_url": None, "result_seconds": {"geospy": seconds}}
+    return {
+        "geospy": geo_data["blocks"],
+        "map_url": geo_data["map"],
+        "result_seconds": {"geospy": seconds},
+    }
+
+
+# Browser phases; each fills its own results_data slots
+PHASES = {
+    "pi7": phase_metadata,
+    "ai_content": phase_content,
+    "geospy": phase_geolocation,
+}
+
+
+# ============================================================
+# CORE LOGIC
+# ============================================================
+def _run_phase(phase, img_path, pool, timeout):
+    start = time.monotonic()
+    try:
+        with pool.borrow(timeout) as driver:
+            return PHASES[phase](driver, img_path)
+    finally:
+        timings.record(phase, time.monotonic() - start)
+
+
+def iter_phases(img_path, pool, timeouts=None, remote_metadata=REMOTE_METADATA, normalize=False):
+    """
+    Read metadata locally, then run the browser phases at once, each on
+    its own pooled driver, and yield (phase, fragment, error) as phases
+    finish. The pi7 upload only runs when remote_metadata is set and no
+    metadata was found locally. With normalize, the content and
+    geolocation phases upload a downsized copy, made after the metadata
+    was read. A phase that is still running after its timeout is
+    reported with an error and an empty fragment; its driver goes back
+    to the pool once it returns.
+    """
+    timeouts = {**PHASE_TIMEOUTS, **(timeouts or {})}
+
+    start = time.monotonic()
+    local = read_metadata(img_path)
+    timings.record("metadata (local)", time.monotonic() - start)
+
+    upload_path = img_path
+    if normalize:
+        upload_path, local["upload"] = normalize_image(img_path)
+
+    yield "pi7", local, None
+
+    phases = [phase for phase in PHASES if phase != "pi7"]
+    if remote_metadata and not has_metadata(local):
+        phases.insert(0, "pi7")
+
+    executor = ThreadPoolExecutor(max_workers=len(phases))
+    start = time.monotonic()
+
+    # The downsized copy is removed once every phase using it has returned,
+    # including phases that outlive their timeout
+    unfinished = [len(phases)]
+    unfinished_lock = threading.Lock()
+
+    def release_upload(_):
+        with unfinished_lock:
+            unfinished[0] -= 1
+            last = unfinished[0] == 0
+        if last and upload_path != img_path:
+            remove_quietly(upload_path)
+
+    try:
+        futures = {}
+        for phase in phases:
+            # pi7 reads EXIF, which the downsized copy no longer has
+            path = img_path if phase == "pi7" else upload_path
+            future = executor.submit(_run_phase, phase, path, pool, timeouts[phase])
+            future.add_done_callback(release_upload)
+            futures[future] = phase
+
+        while futures:
+            now = time.monotonic()
+            next_deadline = min(start + timeouts[phase] for phase in futures.values())
+            done, _ = wait(futures, timeout=max(0, next_deadline - now),
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                phase = futures.pop(future)
+                try:
+                    yield phase, future.result(), None
+                except Exception as e:
+                    yield phase, {}, f"{type(e).__name__}: {e}"
+
+            now = time.monotonic()
+            for future, phase in list(futures.items()):
+                if now >= start + timeouts[phase]:
+                    del futures[future]
+                    yield phase, {}, f"Timed out after {timeouts[phase]}s"
+    finally:
+        # Timed out phases are left to finish in the background
+        executor.shutdown(wait=False)
+
+
+def merge_phase(results_data, phase, fragment, error):
+    """
+    Apply one iter_phases result. A map link from EXIF GPS is a recorded
+    position, so GeoSpy's estimate does not replace it. Time-to-result
+    timings of the phases are collected side by side.
+    """
+    for key, value in fragment.items():
+        if key == "map_url" and results_data["map_url"]:
+            continue
+        if key == "result_seconds":
+            results_data[key] = {**(results_data.get(key) or {}), **value}
+            continue
+        results_data[key] = value
+    if error:
+        results_data["errors"][phase] = error
+
+
+def cached_results(img_path, cache, key=None):
+    """
+    Look img_path up in a ResultCache. Returns (results_data, match).
+    A near-duplicate may carry different EXIF, so its metadata is
+    re-read locally and only the remote phases come from the cache.
+    """
+    results_data, match = cache.get(key or fingerprint(img_path))
+    if match == "near":
+        local = read_metadata(img_path)
+        # A cached map link is GeoSpy's unless it came from cached GPS
+        geo_map_url = None if results_data.get("gps") else results_data["map_url"]
+        results_data["pi7"] = local["pi7"]
+        results_data["gps"] = local["gps"]
+        results_data["map_url"] = local["map_url"] or geo_map_url
+    return results_data, match
+
+
+def cache_results(img_path, cache, results_data, key=None):
+    # Failed or timed out phases are retried next time instead
+    if not results_data["errors"]:
+        cache.put(key or fingerprint(img_path), results_data)
+
+
+def run_metadata_analyzer(img_path, pool, timeouts=None, remote_metadata=REMOTE_METADATA,
+                          cache=None, normalize=False):
+    """
+    Run every phase and return the combined results. With a
+    ResultCache, a previously analyzed image is returned without
+    launching any phase.
+    """
+    if cache is not None:
+        key = fingerprint(img_path)
+        cached, _ = cached_results(img_path, cache, key)
+        if cached is not None:
+            return cached
+
+    results_data = empty_results()
+
+    for phase, fragment, error in iter_phases(img_path, pool, timeouts, remote_metadata, normalize):
+        merge_phase(results_data, phase, fragment, error)
+
+    if cache is not None:
+        cache_results(img_path, cache, results_data, key)
+
+    return results_data
@@ -1,19 +1,150 @@
+import hashlib
+import json
 import os
+import sys
 import time
-import tempfile
+
+# `streamlit run image_checker/app.py` only puts this folder on the
+# path; offline_geocoder/ is imported from the repository root
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
 import streamlit as st
 from PIL import Image
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import (
-    UnexpectedAlertPresentException,
-    TimeoutException,
-    StaleElementReferenceException
+from analyzer import (
+    PHASES, REMOTE_METADATA, cache_results, cached_results, empty_results, iter_phases, merge_phase
 )
+from browser_pool import DriverPool
+from dom_wait import timings
+from batch_runner import BATCH_DIR, collect_images, completed_images, run_batch
+from result_cache import ResultCache, fingerprint
+from upload_staging import staged_upload
+
+
+PHASE_TITLES = {
+    "pi7": "📊 Image Metadata Extraction",
+    "ai_content": "🧠 AI Visual Description",
+    "geospy": "📍 Geolocation Intelligence",
+}
+
+
+@st.cache_resource
+def get_driver_pool():
+    # Shared by every session, so analyses skip the browser cold start
+    return DriverPool()
+
+
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+
+# ============================================================
+# BATCH MODE
+# ============================================================
+def _batch_row(row):
+    res = row["Results"] or {}
+    errors = row["Error"] or "; ".join(f"{k}: {v}" for k, v in res.get("errors", {}).items())
+    gps = res.get("gps")
+    return {
+        "Image": row["Image"],
+        "Status": "error" if errors else "ok",
+        "Elapsed (s)": row.get("Elapsed"),
+        "GPS": f"{gps['latitude']}, {gps['longitude']}" if gps else "",
+        "Nearest Place": (gps.get("place") or {}).get("label", "") if gps else "",
+        "Map": res.get("map_url") or "",
+        "AI Description": (res.get("ai_content") or "")[:120],
+        "Errors": errors or "",
+    }
+
+
+def render_batch_mode():
+    st.markdown("<div class='section-header'>Evidence Batch</div>", unsafe_allow_html=True)
+
+    uploads = st.file_uploader(
+        "Upload a zip archive and/or several images",
+        type=["zip", "jpg", "jpeg", "png"],
+        accept_multiple_files=True,
+        key="batch_files"
+    )
+
+    col_workers, col_remote, col_normalize = st.columns(3)
+    workers = col_workers.number_input("Worker processes", min_value=1, max_value=8, value=2)
+    remote_metadata = col_remote.checkbox(
+        "Fall back to pi7 when no metadata is found locally",
+        value=REMOTE_METADATA,
+        key="batch_remote_metadata"
+    )
+    normalize = col_normalize.checkbox(
+        "Downsize before uploading", value=True, key="batch_normalize"
+    )
+
+    if not uploads:
+        st.info("Upload an evidence archive or a set of images to queue them.")
+        return
+
+    # Staged under a digest of the uploads, so running the same
+    # evidence again resumes from its JSONL instead of starting over.
+    digest = hashlib.sha256()
+    for upload in sorted(uploads, key=lambda u: u.name):
+        digest.update(upload.name.encode("utf-8"))
+        digest.update(hashlib.sha256(upload.getbuffer()).digest())
+    batch_dir = os.path.join(BATCH_DIR, digest.hexdigest()[:16])
+    images_dir = os.path.join(batch_dir, "images")
+    output_path = os.path.join(batch_dir, "results.jsonl")
+    os.makedirs(images_dir, exist_ok=True)
+
+    for upload in uploads:
+        name = os.path.basename(upload.name)
+        if name.lower().endswith(".zip"):
+            archive_path = os.path.join(batch_dir, name)
+            if not os.path.exists(archive_path):
+                with open(archive_path, "wb") as f:
+                    f.write(upload.getbuffer())
+            collect_images(archive_path, os.path.join(images_dir, os.path.splitext(name)[0]))
+        else:
+            image_path = os.path.join(images_dir, name)
+            if not os.path.exists(image_path):
+                with open(image_path, "wb") as f:
+                    f.write(upload.getbuffer())
+
+    total = len(collect_images(images_dir))
+    already = len(completed_images(output_path))
+    st.caption(f"{total} images queued, {already} already analyzed.")
+
+    if st.button("🚀 Run / Resume Batch", type="primary", use_container_width=True):
+        progress = st.progress(already / total if total else 1.0)
+        status = st.empty()
+        table = st.empty()
+        rows = []
+
+        for done, total, row in run_batch(
+            images_dir, output_path, workers, remote_metadata=remote_metadata, normalize=normalize
+        ):
+            rows.append(_batch_row(row))
+            progress.progress(done / total)
+            status.caption(f"{done}/{total} analyzed - last: {row['Image']}")
+            table.dataframe(rows, use_container_width=True)
+
+        status.success("Batch complete.")
+
+    if os.path.exists(output_path):
+        with open(output_path, encoding="utf-8") as f:
+            jsonl = f.read()
+        with st.expander("📁 All Batch Results", expanded=True):
+            # Later rows for an image supersede earlier failed attempts
+            latest = {}
+            for line in jsonl.splitlines():
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                latest[row["Image"]] = _batch_row(row)
+            st.dataframe(list(latest.values()), use_container_width=True)
+        st.download_button("⬇️ Download JSONL", jsonl, file_name="image_batch_results.jsonl")
+
 
 # ============================================================
 # MAIN WRAPPER (FOR unified_app.py )
@@ -56,161 +187,15 @@ def main():
     """, unsafe_allow_html=True)
 
     # ========================================================
-    # CORE LOGIC
-    # ========================================================
-    def run_metadata_analyzer(img_path):
-        results_data = {
-            "pi7": [],
-            "ai_content": "",
-            "geospy": [],
-            "map_url": None  # ✅ MAP LINK
-        }
-
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument(
-            "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        )
-
-        driver = webdriver.Chrome(options=chrome_options)
-        wait = WebDriverWait(driver, 20)
-
-        try:
-            # ================= PHASE 1  =================
-            driver.get("https://image.pi7.org/photo-metadata-viewer")
-            upload_input = wait.until(EC.presence_of_element_located((By.ID, "files")))
-            upload_input.send_keys(img_path)
-            wait.until(EC.presence_of_element_located((By.ID, "metaeditorx")))
-            time.sleep(3)
-
-            target_sections = {
-                "PRIMARY IMAGE TAGS": "t_0th",
-                "CAMERA & PHOTO DETAILS": "t_Exif",
-                "GEOLOCATION INFO (GPS)": "t_GPS"
-            }
-
-            extract_js = """
-            var sectionId = arguments[0];
-            var data = [];
-            var container = document.getElementById(sectionId);
-            if (container) {
-                var labels = container.querySelectorAll('label');
-                for (var i = 0; i < labels.length; i++) {
-                    var input = labels[i].querySelector('input');
-                    if (input && input.value && input.value.trim() !== "") {
-                        var labelText = labels[i].innerText.replace(input.value, "").trim();
-                        data.push(labelText + ": " + input.value.trim());
-                    }
-                }
-            }
-            return data;
-            """
-
-            for title, section_id in target_sections.items():
-                sec_results = driver.execute_script(extract_js, section_id)
-                results_data["pi7"].append({"title": title, "data": sec_results})
-
-            # ======== PHASE 2 — IMAGE CONTENT ANALYSIS==========
-            driver.get("https://aiimagechecker.net/imagedetect")
-            time.sleep(2)
-            driver.find_element(By.CSS_SELECTOR, 'input[type="file"]').send_keys(img_path)
-
-            poll_js = """
-            const el = document.querySelector(
-                'div.whitespace-pre-wrap.font-mono.text-sm.bg-gray-50.p-4.rounded-lg'
-            );
-            if (!el) return null;
-            return el.innerText.trim().length > 50 ? el.innerText.trim() : null;
-            """
-
-            start_time = time.time()
-            while time.time() - start_time < 30:
-                analysis_text = driver.execute_script(poll_js)
-                if analysis_text:
-                    results_data["ai_content"] = analysis_text
-                    break
-                time.sleep(1)
-
-            # ================= PHASE 3 — GEOLOCATION =================
-            driver.get("https://aiimagechecker.net/geospy")
-            time.sleep(2)
-            driver.find_element(By.CSS_SELECTOR, 'input[type="file"]').send_keys(img_path)
-
-            poll_geo_js = """
-            const blocks = document.querySelectorAll(
-              'section[aria-label="Photo Analysis Tool"] div.grid.grid-cols-1.md\\\\:grid-cols-2.gap-6 > div'
-            );
-
-            if (!blocks || blocks.length < 1) return null;
-
-            let output = [];
-            blocks.forEach(b => {
-                const txt = b.innerText.trim();
-                if (txt.length > 20) output.push(txt);
-            });
-
-            const mapLink = document.querySelector(
-              'section[aria-label="Photo Analysis Tool"] a[href*="google.com/maps"]'
-            );
-
-            return {
-                blocks: output,
-                map: mapLink ? mapLink.href : null
-            };
-            """
-
-            start_time = time.time()
-            while time.time() - start_time < 30:
-                geo_data = driver.execute_script(poll_geo_js)
-                if geo_data:
-                    results_data["geospy"] = geo_data["blocks"]
-                    results_data["map_url"] = geo_data["map"]
-                    break
-                time.sleep(1)
-
-        finally:
-            driver.quit()
-
-        return results_data
-
-    # ========================================================
-    # STREAMLIT LAYOUT AND INTERACTIONS
+    # REPORT SECTIONS
     # ========================================================
-    st.title("🌐 OSINT Image Forensics")
-
-    col_left, col_right = st.columns([1, 2], gap="large")
-
-    with col_left:
-        st.markdown("<div class='section-header'>Source Image</div>", unsafe_allow_html=True)
-        uploaded_file = st.file_uploader("Upload image for deep analysis", type=["jpg", "jpeg", "png"])
-
-        if uploaded_file:
-            st.image(uploaded_file, caption="Target Scan", use_container_width=True)
+    def render_phase(phase, res):
+        error = res.get("errors", {}).get(phase)
 
-            if st.button("🚀 Run Intelligence Analysis", use_container_width=True, type="primary"):
-                with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp:
-                    tmp.write(uploaded_file.getvalue())
-                    tmp_path = tmp.name
-
-                with st.spinner("Decoding image signatures..."):
-                    results = run_metadata_analyzer(tmp_path)
-                    st.session_state["results"] = results
-
-                os.remove(tmp_path)
-
-    with col_right:
-        st.markdown("<div class='section-header'>Intelligence Reports</div>", unsafe_allow_html=True)
-
-        if "results" in st.session_state:
-            res = st.session_state["results"]
-
-            with st.expander("📊 Image Metadata Extraction"):
+        if phase == "pi7":
+            with st.expander(PHASE_TITLES[phase]):
+                if error:
+                    st.error(error)
                 for section in res["pi7"]:
                     st.markdown(f"**{section['title']}**")
                     if section["data"]:
@@ -219,13 +204,26 @@ def main():
                     else:
                         st.caption("No markers found.")
 
-            with st.expander("🧠 AI Visual Description"):
+                # map_url comes from EXIF whenever GPS tags were found
+                if res.get("gps"):
+                    gps = res["gps"]
+                    st.markdown(f"[🌍 EXIF position {gps['latitude']}, {gps['longitude']}]({res['map_url']})")
+                    if gps.get("place"):
+                        st.caption(f"Near {gps['place']['label']} ({gps['place']['distance_km']} km, offline gazetteer)")
+
+        elif phase == "ai_content":
+            with st.expander(PHASE_TITLES[phase]):
+                if error:
+                    st.error(error)
                 if res["ai_content"]:
                     st.markdown(f"<div class='geo-text'>{res['ai_content']}</div>", unsafe_allow_html=True)
                 else:
                     st.info("Visual content engine returned no text.")
 
-            with st.expander("📍 Geolocation Intelligence", expanded=True):
+        elif phase == "geospy":
+            with st.expander(PHASE_TITLES[phase], expanded=True):
+                if error:
+                    st.error(error)
                 if res["geospy"]:
                     for block in res["geospy"]:
                         st.markdown(f"<div class='geo-text'>{block}</div>", unsafe_allow_html=True)
@@ -235,8 +233,117 @@ def main():
                         st.markdown(f"[🌍 View on Google Maps]({res['map_url']})")
                 else:
                     st.warning("No geolocation data could be inferred.")
-        else:
-            st.info("System ready. Please upload an image to begin extraction.")
+
+    # ========================================================
+    # STREAMLIT LAYOUT AND INTERACTIONS
+    # ========================================================
+    st.title("🌐 OSINT Image Forensics")
+
+    mode = st.radio("Mode", ["Single image", "Batch"], horizontal=True, key="image_mode")
+    if mode == "Batch":
+        render_batch_mode()
+        return
+
+    col_left, col_right = st.columns([1, 2], gap="large")
+
+    # The report slots are laid out before any analysis runs, so each
+    # phase can be drawn into its slot the moment it finishes.
+    with col_right:
+        st.markdown("<div class='section-header'>Intelligence Reports</div>", unsafe_allow_html=True)
+        slots = {phase: st.empty() for phase in PHASES}
+
+    with col_left:
+        st.markdown("<div class='section-header'>Source Image</div>", unsafe_allow_html=True)
+        uploaded_file = st.file_uploader("Upload image for deep analysis", type=["jpg", "jpeg", "png"])
+
+        if uploaded_file:
+            st.image(uploaded_file, caption="Target Scan", use_container_width=True)
+
+            remote_metadata = st.checkbox(
+                "Fall back to pi7 when no metadata is found locally",
+                value=REMOTE_METADATA
+            )
+            normalize = st.checkbox("Downsize before uploading to the content and geolocation tools", value=True)
+            rerun = st.checkbox("Re-run even if this image was analyzed before")
+
+            if st.button("🚀 Run Intelligence Analysis", use_container_width=True, type="primary"):
+                with staged_upload(uploaded_file) as tmp_path:
+                    cache = get_result_cache()
+                    key = fingerprint(tmp_path)
+                    # Looked up before any browser is borrowed
+                    st.session_state["seen_before"] = cache.seen_before(key)
+                    results, match = (None, None) if rerun else cached_results(tmp_path, cache, key)
+
+                    if results is None:
+                        results = empty_results()
+                        for phase, slot in slots.items():
+                            slot.info(f"{PHASE_TITLES[phase]}: running...")
+
+                        with st.spinner("Decoding image signatures..."):
+                            phases = iter_phases(
+                                tmp_path, get_driver_pool(),
+                                remote_metadata=remote_metadata, normalize=normalize
+                            )
+                            for phase, fragment, error in phases:
+                                merge_phase(results, phase, fragment, error)
+                                with slots[phase].container():
+                                    render_phase(phase, results)
+
+                        cache_results(tmp_path, cache, results, key)
+
+                st.session_state["results"] = results
+                st.session_state["cache_match"] = match
+
+            shown = st.session_state.get("results") or {}
+            upload = shown.get("upload")
+            caption = []
+            if upload and upload["bytes_saved"]:
+                caption.append(
+                    f"Uploaded {upload['uploaded_bytes']:,} of {upload['original_bytes']:,} bytes "
+                    f"({upload['bytes_saved']:,} saved, resized in {upload['normalize_seconds']}s)."
+                )
+            # From handing the file to each site until its result showed
+            result_times = [
+                f"{PHASE_TITLES[phase].split(' ', 1)[1]} {seconds}s"
+                for phase, seconds in (shown.get("result_seconds") or {}).items()
+                if seconds is not None
+            ]
+            if result_times:
+                caption.append(f"Time to result: {', '.join(result_times)}.")
+            if caption:
+                st.caption(" ".join(caption))
+
+            if st.session_state.get("cache_match") == "exact":
+                st.success("Loaded the stored analysis of this image.")
+            elif st.session_state.get("cache_match") == "near":
+                st.success("Loaded the stored analysis of a near-identical image; metadata was read from this file.")
+
+            seen_before = st.session_state.get("seen_before")
+            if seen_before:
+                with st.expander(f"🔁 Seen Before ({len(seen_before)} similar images)"):
+                    st.dataframe([
+                        {
+                            "Image SHA-256": m["sha256"][:16],
+                            "Differing Bits": m["distance"],
+                            "First Analyzed": time.strftime("%Y-%m-%d %H:%M", time.localtime(m["seen_at"])),
+                            "Results Stored": m["stored"],
+                        }
+                        for m in seen_before
+                    ], use_container_width=True)
+
+    if "results" in st.session_state:
+        res = st.session_state["results"]
+        for phase, slot in slots.items():
+            with slot.container():
+                render_phase(phase, res)
+    else:
+        slots["pi7"].info("System ready. Please upload an image to begin extraction.")
+
+    latency = timings.summary()
+    if latency:
+        with col_right:
+            with st.expander("⏱️ Phase Latency"):
+                st.dataframe(latency, use_container_width=True)
 
 
 # ============================================================
@@ -0,0 +1,236 @@
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+import zipfile
+
+from result_cache import CACHE_DIR
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+BATCH_DIR = os.path.join(CACHE_DIR, "batches")
+
+
+# ============================================================
+# INPUT
+# ============================================================
+def _is_image(name):
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def collect_images(source, extract_dir=None):
+    """
+    List (name, path) for every image in a folder or zip archive, in
+    name order. Zip members are extracted to extract_dir (by default a
+    directory named after the archive's hash, so a rerun reuses it).
+    """
+    if os.path.isdir(source):
+        images = []
+        for root, _, files in os.walk(source):
+            for filename in files:
+                if _is_image(filename):
+                    path = os.path.join(root, filename)
+                    images.append((os.path.relpath(path, source), os.path.abspath(path)))
+        return sorted(images)
+
+    if zipfile.is_zipfile(source):
+        extract_dir = extract_dir or os.path.join(BATCH_DIR, batch_id(source), "images")
+        images = []
+
+        with zipfile.ZipFile(source) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or not _is_image(member.filename):
+                    continue
+                # Skip macOS resource forks and anything escaping extract_dir
+                if "__MACOSX" in member.filename or os.path.isabs(member.filename) or ".." in member.filename.split("/"):
+                    continue
+
+                path = os.path.abspath(os.path.join(extract_dir, member.filename))
+                if not os.path.exists(path):
+                    archive.extract(member, extract_dir)
+                images.append((member.filename, path))
+
+        return sorted(images)
+
+    if os.path.isfile(source) and _is_image(source):
+        return [(os.path.basename(source), os.path.abspath(source))]
+
+    raise ValueError(f"Not a folder, zip archive or image: {source}")
+
+
+def batch_id(source):
+    """
+    Stable identifier of a zip archive's content.
+    """
+    sha = hashlib.sha256()
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()[:16]
+
+
+def completed_images(output_path):
+    """
+    Names already analyzed without errors in an existing JSONL output.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                # The last line may be cut short by an interruption
+                continue
+            if not row.get("Error") and not row.get("Results", {}).get("errors"):
+                done.add(row["Image"])
+
+    return done
+
+
+# ============================================================
+# WORKERS
+# ============================================================
+def _worker(tasks, results, browsers, remote_metadata, use_cache, normalize):
+    # Imported here so the parent process never loads Selenium
+    from analyzer import run_metadata_analyzer
+    from browser_pool import DriverPool
+    from result_cache import ResultCache
+
+    pool = DriverPool(size=browsers)
+    cache = ResultCache() if use_cache else None
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+
+            name, path = task
+            start = time.monotonic()
+            row = {"Image": name, "Path": path, "Results": None, "Error": None}
+
+            try:
+                row["Results"] = run_metadata_analyzer(
+                    path, pool, remote_metadata=remote_metadata, cache=cache, normalize=normalize
+                )
+            except Exception as e:
+                row["Error"] = f"{type(e).__name__}: {e}"
+
+            row["Elapsed"] = round(time.monotonic() - start, 2)
+            results.put(row)
+    finally:
+        pool.close()
+        if cache is not None:
+            cache.close()
+
+
+def run_batch(source, output_path, workers=2, browsers=3, remote_metadata=False,
+              use_cache=True, extract_dir=None, normalize=False):
+    """
+    Analyze every image of a folder or zip with worker processes, each
+    driving its own browsers. Rows are appended to output_path as JSONL
+    the moment they finish, and images already completed there are
+    skipped, so an interrupted run resumes where it stopped. Yields
+    (done, total, row) after each image.
+    """
+    images = collect_images(source, extract_dir)
+    done = completed_images(output_path)
+    todo = [(name, path) for name, path in images if name not in done]
+
+    total = len(images)
+    finished = total - len(todo)
+    if not todo:
+        return
+
+    ctx = mp.get_context("spawn")
+    tasks = ctx.Queue()
+    results = ctx.Queue()
+
+    for task in todo:
+        tasks.put(task)
+
+    processes = [
+        ctx.Process(
+            target=_worker,
+            args=(tasks, results, browsers, remote_metadata, use_cache, normalize),
+            daemon=True
+        )
+        for _ in range(min(workers, len(todo)))
+    ]
+    for _ in processes:
+        tasks.put(None)
+    for process in processes:
+        process.start()
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    try:
+        with open(output_path, "a", encoding="utf-8") as out:
+            remaining = len(todo)
+            while remaining:
+                try:
+                    row = results.get(timeout=1)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in processes):
+                        raise RuntimeError("All batch workers exited before the queue was drained")
+                    continue
+
+                out.write(json.dumps(row) + "\n")
+                out.flush()
+
+                remaining -= 1
+                finished += 1
+                yield finished, total, row
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Analyze every image of a folder or zip archive and write JSONL results."
+    )
+    parser.add_argument("source", help="Folder or zip archive of images")
+    parser.add_argument("-o", "--output", help="JSONL output (default: <source>.results.jsonl)")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes")
+    parser.add_argument("--browsers", type=int, default=3, help="Browsers per worker")
+    parser.add_argument("--remote-metadata", action="store_true",
+                        help="Fall back to pi7 when no metadata is found locally")
+    parser.add_argument("--no-cache", action="store_true", help="Do not reuse stored analyses")
+    parser.add_argument("--normalize", action="store_true",
+                        help="Upload downsized copies to the content and geolocation tools")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.normpath(args.source) + ".results.jsonl"
+    failed = 0
+
+    for done, total, row in run_batch(
+        args.source, output, args.workers, args.browsers,
+        args.remote_metadata, not args.no_cache, normalize=args.normalize
+    ):
+        errors = row["Error"] or (row["Results"] or {}).get("errors")
+        if errors:
+            failed += 1
+        status = "error" if errors else "ok"
+        print(f"[{done}/{total}] {row['Image']}: {status} ({row['Elapsed']}s)", file=sys.stderr)
+
+    print(f"Results written to {output} ({failed} with errors)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    # The workers import offline_geocoder from the repository root; spawned
+    # processes start with this sys.path
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
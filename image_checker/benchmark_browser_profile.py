@@ -0,0 +1,154 @@
+import argparse
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from browser_pool import BROWSER_PROFILES, launch_driver
+from dom_wait import wait_for_js
+
+
+# ============================================================
+# LOCAL STAND-IN PAGES
+# ============================================================
+# A page shaped like the scraped tools: the result node is rendered by
+# script right after DOMContentLoaded, while images, fonts and a
+# third-party analytics script trickle in from slow endpoints.
+PAGE = """<!doctype html>
+<html><head>
+<link rel="stylesheet" href="/style.css">
+<style>@font-face {{ font-family: x; src: url(/font.woff2); }} body {{ font-family: x; }}</style>
+<script async src="{third_party}/analytics.js"></script>
+</head><body>
+{images}
+<section aria-label="Photo Analysis Tool"><div id="app"></div></section>
+<script>
+document.addEventListener("DOMContentLoaded", function() {{
+    var result = document.createElement("div");
+    result.id = "result";
+    result.innerText = "Estimated location: stand-in result text";
+    document.getElementById("app").appendChild(result);
+}});
+</script>
+</body></html>
+"""
+
+READY_JS = "return document.getElementById('result') ? true : null;"
+
+
+def _handler(delay, third_party, image_count):
+
+    class StandIn(BaseHTTPRequestHandler):
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, content_type, body):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+
+            if path == "/page":
+                images = "\n".join(
+                    f'<img src="/img/{i}.png?{time.time()}">' for i in range(image_count)
+                )
+                body = PAGE.format(third_party=third_party(), images=images)
+                self._send("text/html", body.encode("utf-8"))
+            elif path == "/style.css":
+                self._send("text/css", b"section { display: block; }")
+            elif path == "/analytics.js":
+                time.sleep(delay * 3)
+                self._send("application/javascript", b"window.tracked = true;")
+            else:
+                # Images and fonts: slow, and the body does not matter
+                time.sleep(delay)
+                self._send("application/octet-stream", b"\0" * 2048)
+
+    return StandIn
+
+
+def start_servers(delay, image_count):
+    """
+    Start the first-party server and a "third-party" server on another
+    port. Returns (page URL, third-party URL pattern, servers).
+    """
+    third_party = {}
+    handler = _handler(delay, lambda: third_party["url"], image_count)
+
+    servers = [ThreadingHTTPServer(("127.0.0.1", 0), handler) for _ in range(2)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    first, second = (f"http://127.0.0.1:{s.server_address[1]}" for s in servers)
+    third_party["url"] = second
+
+    return f"{first}/page", f"{second}/*", servers
+
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+def page_ready_times(profile, url, runs):
+    driver = launch_driver(profile)
+    times = []
+
+    try:
+        for _ in range(runs):
+            driver.get("about:blank")
+            start = time.perf_counter()
+            driver.get(url)
+            if not wait_for_js(driver, READY_JS, timeout=30):
+                raise AssertionError("Stand-in page never rendered its result")
+            times.append(time.perf_counter() - start)
+    finally:
+        driver.quit()
+
+    return times
+
+
+def run_benchmark(runs, delay, image_count):
+    url, third_party_pattern, servers = start_servers(delay, image_count)
+
+    # The stand-in third party is not on the real blocklist, so the
+    # light profile is given its pattern as well
+    light = dict(BROWSER_PROFILES["light"])
+    light["blocked_urls"] = light["blocked_urls"] + [third_party_pattern]
+    profiles = {"full": BROWSER_PROFILES["full"], "light": light}
+
+    print(f"{'profile':>8} {'median s':>9} {'p90 s':>7} {'min s':>7}")
+
+    try:
+        results = {}
+        for name, profile in profiles.items():
+            times = sorted(page_ready_times(profile, url, runs))
+            results[name] = statistics.median(times)
+            p90 = times[min(len(times) - 1, int(len(times) * 0.9))]
+            print(f"{name:>8} {results[name]:>9.3f} {p90:>7.3f} {times[0]:>7.3f}")
+
+        speedup = results["full"] / results["light"] if results["light"] else float("inf")
+        print(f"page-ready speedup: {speedup:.1f}x")
+    finally:
+        for server in servers:
+            server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark page-ready time of the full and light browser profiles."
+    )
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.3, help="Seconds per image/font response")
+    parser.add_argument("--images", type=int, default=12)
+    args = parser.parse_args()
+
+    run_benchmark(args.runs, args.delay, args.images)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+POOL_SIZE = int(os.environ.get("IMAGE_CHECKER_BROWSERS", 3))
+MAX_USES = int(os.environ.get("IMAGE_CHECKER_BROWSER_USES", 25))
+BROWSER_PROFILE = os.environ.get("IMAGE_CHECKER_BROWSER_PROFILE", "light")
+
+# Sites the analyzers visit; their cookies and storage are wiped before
+# a driver goes back to the pool so analyses never share a session
+SCRAPED_ORIGINS = (
+    "https://image.pi7.org",
+    "https://aiimagechecker.net",
+)
+
+
+# ============================================================
+# BROWSER PROFILES
+# ============================================================
+# The scrapers only read a few DOM nodes, so images, fonts, media and
+# third-party ad/analytics hosts are never needed. Stylesheets are kept
+# because innerText depends on layout. blob: and data: URLs (the local
+# preview of the uploaded file) are not network requests and still load.
+BLOCKED_EXTENSIONS = (
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico",
+    "woff", "woff2", "ttf", "otf", "eot",
+    "mp4", "webm", "mp3",
+)
+
+# The extension is anchored at the end of the URL or before its query:
+# "*.png*" also blocked /api.pngx or /site.ico-data.js. In these patterns
+# "?" is a wildcard too, so the query's "?" is escaped as "\?".
+BLOCKED_RESOURCE_PATTERNS = [
+    pattern
+    for extension in BLOCKED_EXTENSIONS
+    for pattern in (f"*.{extension}", f"*.{extension}\\?*")
+]
+
+BLOCKED_THIRD_PARTY_PATTERNS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*googlesyndication.com*",
+    "*doubleclick.net*", "*adservice.google.*", "*facebook.net*", "*connect.facebook.*",
+    "*hotjar.com*", "*clarity.ms*", "*amazon-adsystem.com*", "*adnxs.com*",
+    "*criteo.com*", "*taboola.com*", "*outbrain.com*", "*quantserve.com*",
+    "*scorecardresearch.com*", "*fundingchoicesmessages.google.com*",
+]
+
+LIGHT_ARGUMENTS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-domain-reliability",
+    "--disable-client-side-phishing-detection",
+    "--no-first-run",
+    "--mute-audio",
+]
+
+BROWSER_PROFILES = {
+    "full": {
+        "page_load_strategy": "normal",
+        "arguments": [],
+        "blocked_urls": [],
+    },
+    "light": {
+        "page_load_strategy": "eager",
+        "arguments": LIGHT_ARGUMENTS,
+        "blocked_urls": BLOCKED_RESOURCE_PATTERNS + BLOCKED_THIRD_PARTY_PATTERNS,
+    },
+}
+
+
+def _profile(profile):
+    return BROWSER_PROFILES[profile] if isinstance(profile, str) else profile
+
+
+# ============================================================
+# DRIVER SETUP
+# ============================================================
+def build_chrome_options(profile=BROWSER_PROFILE):
+    profile = _profile(profile)
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
+    for argument in profile["arguments"]:
+        chrome_options.add_argument(argument)
+
+    # eager returns from get() at DOMContentLoaded; results are awaited
+    # on the DOM anyway
+    chrome_options.page_load_strategy = profile["page_load_strategy"]
+
+    # Set by the Docker image, which ships Debian's chromium
+    if os.environ.get("CHROME_BIN"):
+        chrome_options.binary_location = os.environ["CHROME_BIN"]
+
+    return chrome_options
+
+
+def launch_driver(profile=BROWSER_PROFILE):
+    """
+    Start Chrome with a profile name from BROWSER_PROFILES or a dict
+    of the same shape.
+    """
+    profile = _profile(profile)
+
+    driver_path = os.environ.get("CHROMEDRIVER_PATH")
+    service = Service(driver_path) if driver_path else Service()
+    driver = webdriver.Chrome(service=service, options=build_chrome_options(profile))
+
+    if profile["blocked_urls"]:
+        # Requests matching these are failed by Chrome before they are sent
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": profile["blocked_urls"]})
+
+    return driver
+
+
+def _is_alive(driver):
+    try:
+        driver.execute_script("return 1")
+        return True
+    except WebDriverException:
+        return False
+
+
+CLEAR_TAB_STORAGE_JS = """
+try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}
+"""
+
+
+def _reset(driver, origins=SCRAPED_ORIGINS):
+    """
+    Bring a used driver back to a blank single-tab state with no
+    cookies or site storage left. Returns False when the browser no
+    longer responds.
+    """
+    try:
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        # WebDriver only sees the current document's cookies and storage,
+        # so clear them before leaving the page...
+        driver.delete_all_cookies()
+        driver.execute_script(CLEAR_TAB_STORAGE_JS)
+        driver.get("about:blank")
+
+        # ...and every other origin's through DevTools
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        for origin in origins:
+            driver.execute_cdp_cmd(
+                "Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"}
+            )
+        return True
+    except WebDriverException:
+        return False
+
+
+def _quit(driver):
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
+
+
+# ============================================================
+# POOL
+# ============================================================
+class DriverPool:
+    """
+    Pre-launched headless Chrome drivers shared between analyses.
+    A driver is health-checked before it is lent out and replaced
+    after max_uses analyses or as soon as it stops responding.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_uses=MAX_USES, profile=BROWSER_PROFILE, prelaunch=True):
+        self.size = size
+        self.max_uses = max_uses
+        self.profile = profile
+
+        self._idle = []      # [driver, uses], most recently returned last
+        self._total = 0      # idle + lent out + launching
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self.launched = 0
+        self.recycled = 0
+        self.crashed = 0
+
+        if prelaunch:
+            self._fill_in_background()
+
+    def _launch(self):
+        driver = launch_driver(self.profile)
+        with self._cond:
+            self.launched += 1
+        return driver
+
+    def _fill(self):
+        while True:
+            with self._cond:
+                if self._closed or self._total >= self.size:
+                    return
+                self._total += 1
+
+            try:
+                driver = self._launch()
+            except Exception:
+                # Launch errors are not all WebDriverException (a missing
+                # chromedriver is an OSError); checkout reports them
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                return
+
+            with self._cond:
+                if self._closed:
+                    self._total -= 1
+                    _quit(driver)
+                    return
+                self._idle.append([driver, 0])
+                self._cond.notify()
+
+    def _fill_in_background(self):
+        threading.Thread(target=self._fill, daemon=True).start()
+
+    def _checkout(self, timeout):
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+                if self._idle:
+                    driver, uses = self._idle.pop()
+                    break
+                if self._total < self.size:
+                    self._total += 1
+                    driver, uses = None, 0
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No browser became available within {timeout}s")
+                self._cond.wait(remaining)
+
+        if driver is not None and not _is_alive(driver):
+            with self._cond:
+                self.crashed += 1
+            _quit(driver)
+            driver, uses = None, 0
+
+        if driver is None:
+            try:
+                driver = self._launch()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                raise
+
+        return driver, uses
+
+    def _checkin(self, driver, uses):
+        if uses < self.max_uses and not self._closed and _reset(driver):
+            with self._cond:
+                if not self._closed:
+                    self._idle.append([driver, uses])
+                    self._cond.notify()
+                    return
+
+        if self._closed:
+            _quit(driver)
+            with self._cond:
+                self._total -= 1
+            return
+
+        _quit(driver)
+        with self._cond:
+            if uses >= self.max_uses:
+                self.recycled += 1
+            else:
+                self.crashed += 1
+            self._total -= 1
+            self._cond.notify()
+
+        # Launch the replacement now rather than in the next analysis
+        self._fill_in_background()
+
+    @contextmanager
+    def borrow(self, timeout=120):
+        """
+        Lend a driver for the duration of a with block.
+        """
+        driver, uses = self._checkout(timeout)
+        try:
+            yield driver
+        finally:
+            self._checkin(driver, uses + 1)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "Size": self.size,
+                "Idle": len(self._idle),
+                "Launched": self.launched,
+                "Recycled": self.recycled,
+                "Crashed": self.crashed,
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+
+        for driver, _ in idle:
+            _quit(driver)
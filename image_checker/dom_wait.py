@@ -0,0 +1,125 @@
+import bisect
+import threading
+import time
+
+# ============================================================
+# EVENT-DRIVEN DOM WAIT
+# ============================================================
+# The condition runs inside the page: once right away, again on every
+# DOM mutation, and on a short in-page interval for changes that are
+# not mutations (such as input.value being set). The WebDriver call
+# returns as soon as the condition is truthy, without polling round trips.
+WAIT_JS = """
+const done = arguments[arguments.length - 1];
+const args = Array.prototype.slice.call(arguments, 0, -1);
+const timeoutMs = args.shift();
+const intervalMs = args.shift();
+const check = function() { %s };
+
+let finished = false;
+let observer = null;
+let timer = null;
+let interval = null;
+
+function finish(value) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(timer);
+    clearInterval(interval);
+    done(value === undefined ? null : value);
+}
+
+function test() {
+    try {
+        const value = check.apply(null, args);
+        if (value) finish(value);
+    } catch (e) {}
+}
+
+test();
+if (!finished) {
+    observer = new MutationObserver(test);
+    observer.observe(document.documentElement || document, {
+        childList: true, subtree: true, characterData: true, attributes: true
+    });
+    interval = setInterval(test, intervalMs);
+    timer = setTimeout(function() { finish(null); }, timeoutMs);
+}
+"""
+
+INTERVAL_MS = 250
+
+
+def wait_for_js(driver, condition_js, *args, timeout=30, label=None):
+    """
+    Resolve with the first truthy value returned by condition_js, a
+    function body that may use arguments[...], or None after timeout
+    seconds. With a label, the wait time is recorded in `timings`.
+    """
+    start = time.monotonic()
+
+    # Leave the page-side timeout room to fire before WebDriver's
+    driver.set_script_timeout(timeout + 5)
+    result = driver.execute_async_script(
+        WAIT_JS % condition_js, int(timeout * 1000), INTERVAL_MS, *args
+    )
+
+    if label:
+        timings.record(label, time.monotonic() - start)
+
+    return result
+
+
+# ============================================================
+# LATENCY HISTOGRAMS
+# ============================================================
+BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60)
+
+
+class LatencyHistogram:
+    """
+    Per-label latency histograms, shared by every analysis in the process.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._counts = {}
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, label, seconds):
+        with self._lock:
+            counts = self._counts.setdefault(label, [0] * (len(self.buckets) + 1))
+            counts[bisect.bisect_left(self.buckets, seconds)] += 1
+
+            # Recent samples only, for percentiles
+            samples = self._samples.setdefault(label, [])
+            samples.append(seconds)
+            if len(samples) > 1000:
+                del samples[:len(samples) - 1000]
+
+    def histogram(self, label):
+        """
+        Return [(upper bound in seconds, count)], the last bound being None.
+        """
+        with self._lock:
+            counts = list(self._counts.get(label, [0] * (len(self.buckets) + 1)))
+        return list(zip(list(self.buckets) + [None], counts))
+
+    def summary(self):
+        rows = []
+        with self._lock:
+            for label, samples in sorted(self._samples.items()):
+                ordered = sorted(samples)
+                rows.append({
+                    "Phase": label,
+                    "Count": sum(self._counts[label]),
+                    "p50 (s)": round(ordered[len(ordered) // 2], 2),
+                    "p95 (s)": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+                    "Max (s)": round(ordered[-1], 2),
+                })
+        return rows
+
+
+timings = LatencyHistogram()
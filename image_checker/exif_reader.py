@@ -0,0 +1,121 @@
+from PIL import ExifTags, Image, UnidentifiedImageError
+
+from offline_geocoder.geocode import MAX_PLACE_DISTANCE_KM, place_label, reverse_geocode
+
+EXIF_IFD = 0x8769
+GPS_IFD = 0x8825
+
+# Pointers to other IFDs and opaque vendor blobs are not worth showing
+SKIPPED_TAGS = {"ExifOffset", "GPSInfo", "MakerNote", "PrintImageMatching", "InteroperabilityOffset"}
+MAX_VALUE_LENGTH = 200
+
+
+def _format_value(value):
+    if isinstance(value, bytes):
+        text = value.rstrip(b"\x00").decode("utf-8", errors="replace").strip()
+        # Undecodable binary data shows up as replacement characters
+        if not text or "\ufffd" in text or len(text) > MAX_VALUE_LENGTH:
+            return None
+        return text
+
+    if isinstance(value, tuple):
+        parts = [_format_value(v) for v in value]
+        return ", ".join(p for p in parts if p is not None) or None
+
+    if isinstance(value, float) or hasattr(value, "numerator"):
+        # Exposure times read as 1/250, like the camera reports them
+        if getattr(value, "numerator", None) == 1 and getattr(value, "denominator", 1) > 1:
+            return f"1/{value.denominator}"
+        number = float(value)
+        return str(int(number)) if number.is_integer() else f"{number:.6g}"
+
+    text = str(value).strip().rstrip("\x00")
+    return text[:MAX_VALUE_LENGTH] or None
+
+
+def _section(tags, names):
+    lines = []
+    for tag, value in tags.items():
+        name = names.get(tag, f"Tag 0x{tag:04X}")
+        if name in SKIPPED_TAGS:
+            continue
+        text = _format_value(value)
+        if text is not None:
+            lines.append(f"{name}: {text}")
+    return lines
+
+
+def _to_degrees(dms, ref):
+    degrees, minutes, seconds = (float(v) for v in dms)
+    decimal = degrees + minutes / 60 + seconds / 3600
+    return -decimal if ref in ("S", "W") else decimal
+
+
+def gps_coordinates(gps_tags):
+    """
+    Decimal (latitude, longitude) from a GPS IFD, or None when the
+    position is missing or malformed.
+    """
+    try:
+        latitude = _to_degrees(gps_tags[2], gps_tags.get(1, "N"))
+        longitude = _to_degrees(gps_tags[4], gps_tags.get(3, "E"))
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        return None
+
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    # Cameras without a fix often write zeros
+    if latitude == 0 and longitude == 0:
+        return None
+
+    return round(latitude, 6), round(longitude, 6)
+
+
+def read_metadata(image):
+    """
+    Read EXIF locally into the same sections the pi7 phase produces.
+    image is a path or file object. Returns a results_data fragment
+    with "pi7", "gps" and "map_url" (None when there is no position).
+    "gps" carries the nearest gazetteer place, found offline.
+    """
+    try:
+        with Image.open(image) as img:
+            exif = img.getexif()
+            exif_tags = exif.get_ifd(EXIF_IFD)
+            gps_tags = exif.get_ifd(GPS_IFD)
+    except (UnidentifiedImageError, OSError):
+        exif, exif_tags, gps_tags = {}, {}, {}
+
+    gps_lines = _section(gps_tags, ExifTags.GPSTAGS)
+    coordinates = gps_coordinates(gps_tags)
+    map_url = None
+    gps = None
+
+    if coordinates:
+        latitude, longitude = coordinates
+        place = reverse_geocode(latitude, longitude)
+        gps_lines.append(f"Latitude (decimal): {latitude}")
+        gps_lines.append(f"Longitude (decimal): {longitude}")
+        if place:
+            place["label"] = place_label(place)
+            gps_lines.append(f"Nearest Place: {place['label']} ({place['distance_km']} km)")
+        else:
+            gps_lines.append(f"Nearest Place: none within {MAX_PLACE_DISTANCE_KM:g} km")
+        map_url = f"https://www.google.com/maps?q={latitude},{longitude}"
+        gps = {"latitude": latitude, "longitude": longitude, "place": place}
+
+    sections = [
+        {"title": "PRIMARY IMAGE TAGS", "data": _section(exif, ExifTags.TAGS)},
+        {"title": "CAMERA & PHOTO DETAILS", "data": _section(exif_tags, ExifTags.TAGS)},
+        {"title": "GEOLOCATION INFO (GPS)", "data": gps_lines},
+    ]
+
+    return {
+        "pi7": sections,
+        "gps": gps,
+        "map_url": map_url,
+    }
+
+
+def has_metadata(fragment):
+    return any(section["data"] for section in fragment["pi7"])
@@ -0,0 +1,286 @@
+import os
+import sqlite3
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# pHash bits that may differ for two files to count as the same picture
+NEAR_DISTANCE = 10
+
+# Each image is hashed whole and as centered crops of these fractions,
+# so a cropped copy matches a stored crop and a screenshot with borders
+# matches through its own crops
+CROPS = (1.0, 0.9, 0.8)
+
+# The 64-bit pHash is split into CHUNKS tables of 16 bits each. Two
+# hashes within distance d share at least one chunk within d // CHUNKS,
+# so a lookup probes a few hundred buckets instead of every image.
+CHUNKS = 4
+CHUNK_BITS = 64 // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+# Hashes added since the tables were last sorted are scanned directly
+REBUILD_AFTER = 4096
+
+
+# ============================================================
+# HASHES
+# ============================================================
+def _pack(bits):
+    return int.from_bytes(np.packbits(bits.flatten()).tobytes(), "big")
+
+
+def _hash_pair(gray):
+    # pHash: signs of the lowest 8x8 DCT frequencies against their median
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8]
+    phash = _pack(low > np.median(low.flatten()[1:]))
+
+    # dHash: one bit per horizontally adjacent pixel pair
+    grid = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    dhash = _pack(grid[:, :-1] > grid[:, 1:])
+
+    return phash, dhash
+
+
+def perceptual_hashes(img_path):
+    """
+    [(crop, pHash, dHash), ...] of an image file for every fraction in
+    CROPS, whole image first, as 64-bit integers. Returns None when
+    OpenCV cannot decode the file. The hashes survive re-encoding,
+    resizing and grayscale conversion.
+    """
+    try:
+        # imdecode instead of imread so non-ASCII Windows paths work
+        gray = cv2.imdecode(np.fromfile(img_path, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    except (OSError, ValueError):
+        return None
+    if gray is None or min(gray.shape) < 8:
+        return None
+
+    height, width = gray.shape
+    hashes = []
+    for crop in CROPS:
+        top = int(height * (1 - crop) / 2)
+        left = int(width * (1 - crop) / 2)
+        hashes.append((crop, *_hash_pair(gray[top:height - top, left:width - left])))
+    return hashes
+
+
+def _signed(value):
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value is not None and value >= 1 << 63 else value
+
+
+def _unsigned(value):
+    return value + (1 << 64) if value is not None and value < 0 else value
+
+
+# Set bits of every byte value, for NumPy < 2.0 (no np.bitwise_count)
+_BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount_table(values):
+    as_bytes = np.ascontiguousarray(values, dtype=np.uint64).view(np.uint8)
+    return _BYTE_BITS[as_bytes].reshape(-1, 8).sum(axis=1, dtype=np.uint8)
+
+
+_popcount = getattr(np, "bitwise_count", _popcount_table)
+
+
+def _flip_masks(radius):
+    """
+    Every CHUNK_BITS mask with at most radius bits set.
+    """
+    masks = [0]
+    frontier = [(0, -1)]
+    for _ in range(radius):
+        grown = []
+        for mask, last in frontier:
+            # Set bits in increasing order so each mask appears once
+            for bit in range(last + 1, CHUNK_BITS):
+                grown.append((mask | (1 << bit), bit))
+        masks.extend(mask for mask, _ in grown)
+        frontier = grown
+    return np.array(masks, dtype=np.int64)
+
+
+# ============================================================
+# INDEX
+# ============================================================
+class PerceptualIndex:
+    """
+    Persistent record of every analyzed image's perceptual hashes,
+    answering "was a near-duplicate of this seen before?" without a
+    scan. Rows live in SQLite; lookups go through multi-index hash
+    tables (one sorted array per pHash chunk) kept in memory, which
+    also pick up rows added by other processes.
+    """
+
+    def __init__(self, path, max_distance=NEAR_DISTANCE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        self.max_distance = max_distance
+
+        # Per image
+        self._sha = []
+        self._seen_at = []
+        self._positions = {}
+
+        # Per hash: the sorted tables cover the arrays, the tail holds
+        # hashes loaded since
+        self._phash = np.zeros(0, dtype=np.uint64)
+        self._dhash = np.zeros(0, dtype=np.uint64)
+        self._image = np.zeros(0, dtype=np.int64)
+        self._tail = ([], [], [])
+        self._tables = []
+        self._masks = {}
+        self._last_rowid = 0
+
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS images (
+                    sha256 TEXT PRIMARY KEY,
+                    seen_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS hashes (
+                    sha256 TEXT NOT NULL,
+                    crop REAL NOT NULL,
+                    phash INTEGER NOT NULL,
+                    dhash INTEGER NOT NULL,
+                    PRIMARY KEY (sha256, crop)
+                );
+            """)
+            self._refresh()
+            self._rebuild()
+
+    def _refresh(self):
+        rows = self._conn.execute("""
+            SELECT hashes.rowid, hashes.sha256, phash, dhash, seen_at
+            FROM hashes JOIN images ON images.sha256 = hashes.sha256
+            WHERE hashes.rowid > ? ORDER BY hashes.rowid
+        """, (self._last_rowid,))
+
+        phashes, dhashes, images = self._tail
+        for rowid, sha, phash, dhash, seen_at in rows:
+            self._last_rowid = rowid
+            if sha not in self._positions:
+                self._positions[sha] = len(self._sha)
+                self._sha.append(sha)
+                self._seen_at.append(seen_at)
+            phashes.append(_unsigned(phash))
+            dhashes.append(_unsigned(dhash))
+            images.append(self._positions[sha])
+
+        if len(phashes) > REBUILD_AFTER:
+            self._rebuild()
+
+    def _rebuild(self):
+        phashes, dhashes, images = self._tail
+        self._phash = np.concatenate([self._phash, np.array(phashes, dtype=np.uint64)])
+        self._dhash = np.concatenate([self._dhash, np.array(dhashes, dtype=np.uint64)])
+        self._image = np.concatenate([self._image, np.array(images, dtype=np.int64)])
+        self._tail = ([], [], [])
+
+        self._tables = []
+        for i in range(CHUNKS):
+            chunks = (self._phash >> np.uint64(i * CHUNK_BITS)) & np.uint64(CHUNK_MASK)
+            order = np.argsort(chunks, kind="stable")
+            # bounds[c]:bounds[c + 1] is the slice of order holding chunk c
+            bounds = np.searchsorted(chunks[order], np.arange(CHUNK_MASK + 2, dtype=np.uint64))
+            self._tables.append((bounds, order))
+
+    def add(self, sha, hashes):
+        """
+        Record an image by file SHA-256 and perceptual_hashes(). An image
+        already indexed keeps its first seen_at.
+        """
+        if not hashes:
+            return
+
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO images VALUES (?, ?)", (sha, time.time()))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO hashes VALUES (?, ?, ?, ?)",
+                [(sha, crop, _signed(phash), _signed(dhash)) for crop, phash, dhash in hashes]
+            )
+            self._refresh()
+
+    def _candidates(self, phash, radius):
+        if radius not in self._masks:
+            self._masks[radius] = _flip_masks(radius)
+        masks = self._masks[radius]
+
+        found = []
+        for i, (bounds, order) in enumerate(self._tables):
+            probes = (((phash >> (i * CHUNK_BITS)) & CHUNK_MASK) ^ masks).astype(np.int64)
+            starts = bounds[probes]
+            lengths = bounds[probes + 1] - starts
+
+            # Concatenate the order[start:start + length] buckets without
+            # a Python loop: each bucket's offsets shifted to its start
+            total = int(lengths.sum())
+            if total:
+                offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+                found.append(order[np.repeat(starts, lengths) + offsets])
+
+        # A hash close in several chunks appears more than once; that
+        # only costs a repeated distance check
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(found)
+
+    def search(self, hashes, max_distance=None, limit=5):
+        """
+        Indexed images within max_distance pHash bits of any of hashes,
+        closest first (ties broken by dHash distance). Each match is a
+        dict with "sha256", "distance" and "seen_at".
+        """
+        if not hashes:
+            return []
+        max_distance = self.max_distance if max_distance is None else max_distance
+
+        with self._lock:
+            self._refresh()
+            tail = tuple(np.array(values, dtype=dtype) for values, dtype in zip(
+                self._tail, (np.uint64, np.uint64, np.int64)
+            ))
+
+            best = {}
+            for _, phash, dhash in hashes:
+                candidates = self._candidates(phash, max_distance // CHUNKS)
+                indexed = (self._phash[candidates], self._dhash[candidates], self._image[candidates])
+
+                for phashes, dhashes, images in (indexed, tail):
+                    distances = _popcount(phashes ^ np.uint64(phash))
+                    close = distances <= max_distance
+                    dhash_distances = _popcount(dhashes[close] ^ np.uint64(dhash))
+
+                    for image, distance, dhash_distance in zip(
+                        images[close].tolist(), distances[close].tolist(), dhash_distances.tolist()
+                    ):
+                        score = (distance, dhash_distance)
+                        if image not in best or score < best[image]:
+                            best[image] = score
+
+            ranked = sorted(best.items(), key=lambda item: item[1])[:limit]
+            return [
+                {
+                    "sha256": self._sha[image],
+                    "distance": distance,
+                    "seen_at": self._seen_at[image],
+                }
+                for image, (distance, _) in ranked
+            ]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sha)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
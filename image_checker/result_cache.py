@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from perceptual_index import NEAR_DISTANCE, PerceptualIndex, _signed, perceptual_hashes
+
+CACHE_DIR = os.environ.get(
+    "IMAGE_CHECKER_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "image_checker")
+)
+RESULT_CACHE_PATH = os.path.join(CACHE_DIR, "results.sqlite")
+PERCEPTUAL_INDEX_PATH = os.path.join(CACHE_DIR, "perceptual.sqlite")
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+# ============================================================
+# FINGERPRINTS
+# ============================================================
+def fingerprint(img_path):
+    """
+    (sha256 of the file bytes, perceptual hashes) used as cache key.
+    """
+    sha = hashlib.sha256()
+    with open(img_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest(), perceptual_hashes(img_path)
+
+
+# ============================================================
+# CACHE
+# ============================================================
+class ResultCache:
+    """
+    Persistent results_data store keyed by the SHA-256 of the image.
+    Lookups fall back to the closest stored image in a PerceptualIndex
+    so re-encoded copies, screenshots and resizes also hit. Entries
+    expire after ttl seconds and the least recently used are evicted
+    past max_entries or max_bytes; the index keeps every image seen.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES, near_distance=NEAR_DISTANCE,
+                 index_path=PERCEPTUAL_INDEX_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.index = PerceptualIndex(index_path, near_distance)
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS results (
+                    sha256 TEXT PRIMARY KEY,
+                    dhash INTEGER,
+                    results TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+            """)
+
+    def _nearest(self, hashes, oldest):
+        # Near-duplicates whose results were evicted are skipped
+        for match in self.index.search(hashes, limit=20):
+            row = self._conn.execute(
+                "SELECT results FROM results WHERE sha256 = ? AND created_at >= ?",
+                (match["sha256"], oldest)
+            ).fetchone()
+            if row is not None:
+                return match["sha256"], row
+        return None, None
+
+    def get(self, key):
+        """
+        Return (results_data, "exact" or "near") for a fingerprint key,
+        or (None, None) on a miss.
+        """
+        sha, hashes = key
+        now = time.time()
+        oldest = now - self.ttl
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results FROM results WHERE sha256 = ? AND created_at >= ?",
+                (sha, oldest)
+            ).fetchone()
+            match = "exact"
+
+            if row is None and hashes:
+                near, row = self._nearest(hashes, oldest)
+                if near is not None:
+                    sha = near
+                    match = "near"
+
+            if row is None:
+                self.misses += 1
+                return None, None
+
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE results SET last_used = ? WHERE sha256 = ?", (now, sha)
+                )
+
+            if match == "exact":
+                self.hits += 1
+            else:
+                self.near_hits += 1
+
+        return json.loads(row[0]), match
+
+    def put(self, key, results_data):
+        sha, hashes = key
+        payload = json.dumps(results_data)
+        now = time.time()
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (sha, _signed(hashes[0][2]) if hashes else None, payload, len(payload), now, now)
+            )
+            self._evict(now)
+        self.index.add(sha, hashes)
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl,))
+
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Least recently used first, until both limits hold
+        doomed = []
+        for sha, size in self._conn.execute(
+            "SELECT sha256, size FROM results ORDER BY last_used"
+        ):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((sha,))
+            count -= 1
+            total -= size
+
+        self._conn.executemany("DELETE FROM results WHERE sha256 = ?", doomed)
+
+    def seen_before(self, key, limit=5):
+        """
+        Earlier images within near_distance of a fingerprint key, closest
+        first, each marked with whether its results are still stored.
+        The image itself is left out.
+        """
+        sha, hashes = key
+        oldest = time.time() - self.ttl
+        matches = [m for m in self.index.search(hashes, limit=limit + 1) if m["sha256"] != sha]
+
+        with self._lock:
+            for match in matches:
+                match["stored"] = self._conn.execute(
+                    "SELECT 1 FROM results WHERE sha256 = ? AND created_at >= ?",
+                    (match["sha256"], oldest)
+                ).fetchone() is not None
+
+        return matches[:limit]
+
+    def stats(self):
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        return {
+            "Entries": count,
+            "Bytes": total,
+            "Hits": self.hits,
+            "Near Hits": self.near_hits,
+            "Misses": self.misses,
+            "Indexed Images": len(self.index),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        self.index.close()
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# tmpfs keeps staged uploads off the disk; other systems fall back
+# to the regular temp directory
+STAGING_DIR = "/dev/shm" if os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+
+NORMALIZE_MAX_SIDE = int(os.environ.get("IMAGE_CHECKER_NORMALIZE_MAX_SIDE", 1600))
+NORMALIZE_QUALITY = 85
+
+
+# ============================================================
+# STAGING
+# ============================================================
+def _stage(write, suffix):
+    """
+    Create a file in STAGING_DIR and fill it with write(file). /dev/shm
+    is small in containers (64 MB by default in Docker), so when the
+    write fails there the file is written to the regular temp directory.
+    """
+    fallback = tempfile.gettempdir()
+
+    for directory in dict.fromkeys((STAGING_DIR, fallback)):
+        path = None
+        try:
+            with tempfile.NamedTemporaryFile(dir=directory, suffix=suffix, delete=False) as tmp:
+                path = tmp.name
+                write(tmp)
+            return path
+        except OSError:
+            if path:
+                remove_quietly(path)
+            if directory == fallback:
+                raise
+
+
+def stage_bytes(data, suffix=""):
+    """
+    Write bytes or a buffer (e.g. UploadedFile.getbuffer(), which is a
+    view of Streamlit's copy rather than a new one) to STAGING_DIR.
+    Returns the path; the caller removes it.
+    """
+    return _stage(lambda tmp: tmp.write(data), suffix)
+
+
+@contextmanager
+def staged_upload(uploaded_file):
+    path = stage_bytes(uploaded_file.getbuffer(), os.path.splitext(uploaded_file.name)[1])
+    try:
+        yield path
+    finally:
+        remove_quietly(path)
+
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# ============================================================
+# NORMALIZATION
+# ============================================================
+def normalize_image(img_path, max_side=NORMALIZE_MAX_SIDE, quality=NORMALIZE_QUALITY):
+    """
+    Downsize an image for upload to the remote content and geolocation
+    tools. EXIF orientation is applied to the pixels, then all metadata
+    is dropped, so metadata must be read from the original first.
+    Returns (path to upload, stats). The path is the original when
+    re-encoding would not make it smaller; otherwise it is a new staged
+    file the caller removes.
+    """
+    start = time.perf_counter()
+    original_bytes = os.path.getsize(img_path)
+    stats = {
+        "original_bytes": original_bytes,
+        "uploaded_bytes": original_bytes,
+        "bytes_saved": 0,
+        "normalize_seconds": 0.0,
+    }
+
+    try:
+        with Image.open(img_path) as img:
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+
+            normalized_path = _stage(
+                lambda tmp: img.save(tmp, "JPEG", quality=quality, optimize=True), ".jpg"
+            )
+    except (UnidentifiedImageError, OSError):
+        return img_path, stats
+
+    normalized_bytes = os.path.getsize(normalized_path)
+    stats["normalize_seconds"] = round(time.perf_counter() - start, 3)
+
+    if normalized_bytes >= original_bytes:
+        remove_quietly(normalized_path)
+        return img_path, stats
+
+    stats["uploaded_bytes"] = normalized_bytes
+    stats["bytes_saved"] = original_bytes - normalized_bytes
+    return normalized_path, stats
@@ -0,0 +1,280 @@
+import csv
+import math
+import os
+from functools import lru_cache
+
+GEOCODER_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLED_GAZETTEER = os.path.join(GEOCODER_DIR, "gazetteer.csv")
+
+# A GeoNames dump (e.g. cities15000.txt) can replace the bundled list
+GAZETTEER_PATH = os.environ.get("OFFLINE_GAZETTEER", BUNDLED_GAZETTEER)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Beyond this the nearest place says little about where a photo was
+# taken: with the bundled list Reno's nearest place is San Francisco,
+# 300 km away. A denser GeoNames dump can use a smaller radius.
+MAX_PLACE_DISTANCE_KM = float(os.environ.get("OFFLINE_GEOCODER_MAX_KM", 100))
+
+
+# ============================================================
+# GAZETTEER FILES
+# ============================================================
+def load_gazetteer(path=BUNDLED_GAZETTEER):
+    """
+    Places from the bundled CSV format: name, aliases ("|"-separated),
+    admin1, country_code, country, latitude, longitude. Earlier rows win
+    when names repeat, so the file lists the better known place first.
+    """
+    places = []
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            places.append({
+                "name": row["name"],
+                "aliases": [a for a in row["aliases"].split("|") if a],
+                "admin1": row["admin1"],
+                "country_code": row["country_code"],
+                "country": row["country"],
+                "latitude": float(row["latitude"]),
+                "longitude": float(row["longitude"]),
+            })
+    return places
+
+
+def load_geonames(path, admin1_path=None, country_names=None):
+    """
+    Places from a GeoNames cities dump (tab-separated, no header).
+    Admin1 names come from admin1CodesASCII.txt, looked for next to the
+    dump by default; without it the admin1 code is shown. Country names
+    come from country_names (code -> name), else the code is shown.
+    Places are ordered by population so common names resolve to the
+    largest place.
+    """
+    admin1_path = admin1_path or os.path.join(os.path.dirname(path), "admin1CodesASCII.txt")
+    country_names = country_names or {}
+
+    admin1_names = {}
+    if os.path.exists(admin1_path):
+        with open(admin1_path, encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) >= 2:
+                    admin1_names[fields[0]] = fields[1]
+
+    places = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 15:
+                continue
+
+            name, ascii_name, country_code, admin1_code = fields[1], fields[2], fields[8], fields[10]
+            places.append((int(fields[14] or 0), {
+                "name": name,
+                "aliases": [ascii_name] if ascii_name and ascii_name != name else [],
+                "admin1": admin1_names.get(f"{country_code}.{admin1_code}", admin1_code),
+                "country_code": country_code,
+                "country": country_names.get(country_code, country_code),
+                "latitude": float(fields[4]),
+                "longitude": float(fields[5]),
+            }))
+
+    places.sort(key=lambda item: -item[0])
+    return [place for _, place in places]
+
+
+def load_places(path=GAZETTEER_PATH):
+    if path.lower().endswith(".csv"):
+        return load_gazetteer(path)
+
+    # GeoNames only has country codes; the bundled file knows the names
+    country_names = {p["country_code"]: p["country"] for p in load_gazetteer(BUNDLED_GAZETTEER)}
+    return load_geonames(path, country_names=country_names)
+
+
+# ============================================================
+# KD-TREE
+# ============================================================
+def _to_xyz(latitude, longitude):
+    # Points on the unit sphere: straight-line (chord) distance grows
+    # with great-circle distance, so a plain 3-d tree finds the nearest
+    # place without any special case at the poles or the date line
+    lat = math.radians(latitude)
+    lon = math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def _chord_to_km(squared_chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(squared_chord) / 2))
+
+
+class KDTree:
+    """
+    Static 3-d tree over a list of (x, y, z) points, stored as flat
+    child lists. nearest() returns (index, squared distance).
+    """
+
+    def __init__(self, points):
+        self.points = points
+        self._left = [-1] * len(points)
+        self._right = [-1] * len(points)
+        self._axis = [0] * len(points)
+        self._root = self._build(list(range(len(points))), 0)
+
+    def _build(self, indices, depth):
+        if not indices:
+            return -1
+
+        axis = depth % 3
+        indices.sort(key=lambda i: self.points[i][axis])
+        middle = len(indices) // 2
+        node = indices[middle]
+
+        self._axis[node] = axis
+        self._left[node] = self._build(indices[:middle], depth + 1)
+        self._right[node] = self._build(indices[middle + 1:], depth + 1)
+        return node
+
+    def nearest(self, point):
+        best, best_distance = -1, math.inf
+        points, left, right, axes = self.points, self._left, self._right, self._axis
+
+        # (node, lower bound of the squared distance to its subtree)
+        stack = [(self._root, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if node < 0 or bound >= best_distance:
+                continue
+
+            other = points[node]
+            distance = (
+                (point[0] - other[0]) ** 2
+                + (point[1] - other[1]) ** 2
+                + (point[2] - other[2]) ** 2
+            )
+            if distance < best_distance:
+                best, best_distance = node, distance
+
+            diff = point[axes[node]] - other[axes[node]]
+            near, far = (left[node], right[node]) if diff < 0 else (right[node], left[node])
+            # The far side is popped last, once the best can only be smaller
+            stack.append((far, diff * diff))
+            stack.append((near, 0.0))
+
+        return best, best_distance
+
+
+# ============================================================
+# GAZETTEER
+# ============================================================
+def _public(place):
+    return {key: value for key, value in place.items() if key != "aliases"}
+
+
+class Gazetteer:
+    """
+    Offline place lookups over a list of places: reverse() maps a
+    position to the nearest place, lookup() maps a place, admin region
+    or country name to its record.
+    """
+
+    def __init__(self, places):
+        self.places = places
+        self._tree = KDTree([_to_xyz(p["latitude"], p["longitude"]) for p in places])
+
+        self._cities = {}
+        self._regions = {}
+        self._countries = {}
+        for place in places:
+            for name in [place["name"]] + place["aliases"]:
+                self._cities.setdefault(name.lower(), place)
+            self._regions.setdefault(place["admin1"].lower(), place)
+            self._countries.setdefault(place["country"].lower(), place)
+
+    def reverse(self, latitude, longitude, max_km=MAX_PLACE_DISTANCE_KM):
+        """
+        Nearest place to a position, with "distance_km" to it, or None
+        when no place is within max_km (None for no limit).
+        """
+        index, squared_chord = self._tree.nearest(_to_xyz(latitude, longitude))
+        if index < 0:
+            return None
+
+        distance_km = _chord_to_km(squared_chord)
+        if max_km is not None and distance_km > max_km:
+            return None
+
+        place = _public(self.places[index])
+        place["distance_km"] = round(distance_km, 1)
+        return place
+
+    def lookup(self, name):
+        """
+        Record of a place, admin region or country name (in that order
+        of preference), with "feature" set to "place", "region" or
+        "country". Regions and countries have no coordinates. Returns
+        None for unknown names.
+        """
+        key = name.strip().lower()
+
+        if key in self._cities:
+            place = _public(self._cities[key])
+            place["feature"] = "place"
+            return place
+
+        if key in self._regions:
+            region = self._regions[key]
+            return {
+                "name": region["admin1"],
+                "admin1": region["admin1"],
+                "country_code": region["country_code"],
+                "country": region["country"],
+                "latitude": None,
+                "longitude": None,
+                "feature": "region",
+            }
+
+        if key in self._countries:
+            country = self._countries[key]
+            return {
+                "name": country["country"],
+                "admin1": None,
+                "country_code": country["country_code"],
+                "country": country["country"],
+                "latitude": None,
+                "longitude": None,
+                "feature": "country",
+            }
+
+        return None
+
+    def names(self):
+        """
+        Every name lookup() knows, with original capitalization.
+        """
+        names = set()
+        for place in self.places:
+            names.update([place["name"], place["admin1"], place["country"]] + place["aliases"])
+        names.discard("")
+        return names
+
+
+@lru_cache(maxsize=None)
+def get_gazetteer(path=GAZETTEER_PATH):
+    return Gazetteer(load_places(path))
+
+
+def reverse_geocode(latitude, longitude, max_km=MAX_PLACE_DISTANCE_KM):
+    return get_gazetteer().reverse(latitude, longitude, max_km)
+
+
+def place_label(place):
+    """
+    "Mumbai, Maharashtra, India", without repeating a part (so
+    Singapore stays "Singapore").
+    """
+    parts = []
+    for part in (place.get("name"), place.get("admin1"), place.get("country")):
+        if part and part not in parts:
+            parts.append(part)
+    return ", ".join(parts)
@@ -1,27 +1,95 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from apify_client import ApifyClient
 from config import APIFY_TOKEN, ACTORS
 
+# Actor runs spend their time waiting on Apify, so threads overlap them
+# well; the cap keeps a fan-out within the account's concurrent-run limit
+MAX_CONCURRENT_RUNS = int(os.environ.get("APIFY_MAX_CONCURRENT_RUNS", 4))
+
+# Apify aborts a run after this long; the client waits a little longer
+# for the final status before giving up on it
+RUN_TIMEOUT_SECS = int(os.environ.get("APIFY_RUN_TIMEOUT", 180))
+WAIT_MARGIN_SECS = 30
+
+FINISHED_STATUSES = {"SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"}
+
 client = ApifyClient(APIFY_TOKEN)
 
-def _safe_items(run):
-    items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
+RUN_INPUTS = {
+    "instagram": lambda username, limit: {
+        "directUrls": [f"https://www.instagram.com/{username}/"],
+        "resultsType": "posts",
+        "resultsLimit": limit
+    },
+    "facebook": lambda username, limit: {
+        "startUrls": [{"url": f"https://www.facebook.com/{username}/"}],
+        "resultsLimit": limit
+    },
+}
+
+def _safe_items(run, api=None):
+    api = api or client
+    items = list(api.dataset(run["defaultDatasetId"]).iterate_items())
     return [item for item in items if isinstance(item, dict)]
 
-def fetch_instagram(username, limit=5):
-    run = client.actor(ACTORS["instagram"]).call(
-        run_input={
-            "directUrls": [f"https://www.instagram.com/{username}/"],
-            "resultsType": "posts",
-            "resultsLimit": limit
-        }
+def run_actor(platform, username, limit=5, timeout_secs=None, api=None):
+    """
+    Run the platform's actor for one target. Returns (items, error);
+    error is None when the run succeeded. A run that failed or timed
+    out still returns whatever items it stored.
+    """
+    api = api or client
+
+    run = api.actor(ACTORS[platform]).call(
+        run_input=RUN_INPUTS[platform](username, limit),
+        timeout_secs=timeout_secs,
+        wait_secs=timeout_secs + WAIT_MARGIN_SECS if timeout_secs else None
     )
-    return _safe_items(run)
+    if run is None:
+        return [], "Run could not be started"
+
+    status = run.get("status")
+    if status not in FINISHED_STATUSES:
+        # Still running when the wait ran out: stop paying for it
+        api.run(run["id"]).abort()
+        status = "TIMED-OUT"
+
+    items = _safe_items(run, api)
+    return items, None if status == "SUCCEEDED" else f"Run {status}"
+
+def fetch_instagram(username, limit=5):
+    return run_actor("instagram", username, limit)[0]
 
 def fetch_facebook(username, limit=5):
-    run = client.actor(ACTORS["facebook"]).call(
-        run_input={
-            "startUrls": [{"url": f"https://www.facebook.com/{username}/"}],
-            "resultsLimit": limit
-        }
-    )
-    return _safe_items(run)
+    return run_actor("facebook", username, limit)[0]
+
+def fetch_many(targets, limit=5, max_concurrency=MAX_CONCURRENT_RUNS,
+               timeout_secs=RUN_TIMEOUT_SECS, api=None):
+    """
+    Run actors for many (platform, username) targets at once, at most
+    max_concurrency at a time. Yields (platform, username, items, error)
+    as each run finishes, so callers can merge results early.
+    """
+    targets = list(dict.fromkeys(targets))
+    if not targets:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(targets))))
+    futures = {
+        executor.submit(run_actor, platform, username, limit, timeout_secs, api): (platform, username)
+        for platform, username in targets
+    }
+
+    try:
+        for future in as_completed(futures):
+            platform, username = futures[future]
+            try:
+                items, error = future.result()
+            except Exception as e:
+                items, error = [], f"{type(e).__name__}: {e}"
+            yield platform, username, items, error
+    finally:
+        # Runs not yet started are dropped if the caller stops early
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,10 +1,60 @@
 import re
 
-# Expandable gazetteer (can later be replaced with spaCy / GeoNames)
-KNOWN_LOCATIONS = [
-    "India", "Mumbai", "Delhi", "London", "New York",
-    "Los Angeles", "Dubai", "Paris", "Singapore"
-]
+from offline_geocoder.geocode import get_gazetteer
+
+# Places, admin regions, countries and aliases of the bundled gazetteer
+# (or the GeoNames dump OFFLINE_GAZETTEER points to)
+KNOWN_LOCATIONS = sorted(get_gazetteer().names())
+
+# Shorter names inside a hashtag are too often part of another word
+# (#goals is not Goa), so they only match a whole tag
+MIN_HASHTAG_SUBSTRING = 5
+
+# Names that are at least as often a person, brand or team ("Paris
+# Hilton", "Jordan shoes", "Phoenix Suns"): they only count after a
+# word like "in" or "from", or as a whole hashtag
+AMBIGUOUS_LOCATIONS = {
+    "Austin", "Canton", "Chile", "Cuba", "Dallas", "Darwin", "Denver",
+    "Florence", "Georgia", "Houston", "Jamaica", "Jordan", "Kingston",
+    "Lima", "Medina", "Orlando", "Paris", "Perth", "Phoenix", "Porto",
+    "Roma", "Salvador", "Santiago", "Sydney", "Turkey", "Valencia",
+    "Victoria", "Washington",
+}
+
+# A location word right before the name: "in paris", "from Jordan", "📍Goa"
+_CUE = re.compile(
+    r"(?:\b(?:in|at|from|to|near|around|visiting|across|via)\s+|\U0001F4CD\s*)$",
+    re.IGNORECASE
+)
+
+# Longest names first, so "New Delhi" wins over "Delhi"
+_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(loc) for loc in sorted(KNOWN_LOCATIONS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE
+)
+_CANONICAL = {loc.lower(): loc for loc in KNOWN_LOCATIONS}
+_HASHTAG_KEYS = {}
+for _loc in KNOWN_LOCATIONS:
+    _HASHTAG_KEYS.setdefault(_loc.lower().replace(" ", ""), _loc)
+_HASHTAG_PATTERN = re.compile(
+    "|".join(
+        re.escape(key)
+        for key, loc in sorted(_HASHTAG_KEYS.items(), key=lambda item: -len(item[0]))
+        if len(key) >= MIN_HASHTAG_SUBSTRING and loc not in AMBIGUOUS_LOCATIONS
+    )
+)
+
+
+def _is_location(text, match):
+    """
+    A lower-case name ("nice", "reading") or an ambiguous one is only a
+    location after a cue word; a capitalized unambiguous name always is.
+    """
+    loc = _CANONICAL[match.group(1).lower()]
+    if match.group(1)[0].isupper() and loc not in AMBIGUOUS_LOCATIONS:
+        return True
+    return bool(_CUE.search(text, max(0, match.start() - 16), match.start()))
+
 
 def extract_locations(text: str):
     """
@@ -18,15 +68,25 @@ def extract_locations(text: str):
     found = set()
 
     # ---------- Plain text ----------
-    for loc in KNOWN_LOCATIONS:
-        if re.search(rf"\b{re.escape(loc)}\b", text, re.IGNORECASE):
-            found.add(loc)
+    for match in _PATTERN.finditer(text):
+        if _is_location(text, match):
+            found.add(_CANONICAL[match.group(1).lower()])
 
     # ---------- Hashtags ----------
     hashtags = re.findall(r"#(\w+)", text)
     for tag in hashtags:
-        for loc in KNOWN_LOCATIONS:
-            if loc.lower() in tag.lower():
-                found.add(loc)
+        tag = tag.lower()
+        if tag in _HASHTAG_KEYS:
+            found.add(_HASHTAG_KEYS[tag])
+            continue
+        for key in _HASHTAG_PATTERN.findall(tag):
+            found.add(_HASHTAG_KEYS[key])
 
     return list(found)
+
+def locate(name):
+    """
+    Gazetteer record (coordinates, admin region, country) of an
+    extracted location, or None.
+    """
+    return get_gazetteer().lookup(name)
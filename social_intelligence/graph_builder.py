@@ -2,7 +2,7 @@ import networkx as nx
 import matplotlib.pyplot as plt
 from datetime import datetime
 from textwrap import fill
-from entity_extractor import extract_locations
+from entity_extractor import extract_locations, locate
 import re
 import os
 
@@ -63,8 +63,16 @@ def build_semantic_knowledge_graph(posts, username, platform):
             G.add_edge(post_node, vid_node, relationship="CONTAINS_VIDEO", confidence=1.0)
 
         for loc in extract_locations(post["text"]):
-            loc_node = f"Location:{loc}"
-            G.add_node(loc_node, type="GeospatialData", label=loc)
+            # Aliases (Bombay, Calcutta) share their place's node
+            place = locate(loc) or {}
+            name = place.get("name", loc)
+            loc_node = f"Location:{name}"
+            G.add_node(
+                loc_node, type="GeospatialData", label=name,
+                feature=place.get("feature"), admin1=place.get("admin1"),
+                country=place.get("country"), country_code=place.get("country_code"),
+                latitude=place.get("latitude"), longitude=place.get("longitude")
+            )
             G.add_edge(text_node, loc_node, relationship="MENTIONS_LOCATION", confidence=0.75)
 
     return G
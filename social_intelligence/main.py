@@ -1,3 +1,11 @@
+import os
+import sys
+
+# For the offline_geocoder package at the repository root
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
 from apify_fetcher import fetch_instagram, fetch_facebook
 from normalizer import normalize_post
 from graph_builder import build_semantic_knowledge_graph, visualize_semantic_graph
@@ -21,10 +21,17 @@ def render_graph_pyvis(G, output_html):
     }
 
     for node, data in G.nodes(data=True):
+        title = data.get("type")
+        if data.get("country"):
+            region = ", ".join(p for p in (data.get("admin1"), data.get("country")) if p and p != data.get("label"))
+            title = f"{title}\n{region}" if region else title
+            if data.get("latitude") is not None:
+                title += f"\n{data['latitude']}, {data['longitude']}"
+
         net.add_node(
             node,
             label=data.get("label", node),
-            title=data.get("type"),
+            title=title,
             color=color_map.get(data.get("type"), "#ffffff"),
             size=30 if data.get("type") == "User" else 18
         )
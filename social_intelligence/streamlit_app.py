@@ -8,6 +8,11 @@ CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 if CURRENT_DIR not in sys.path:
     sys.path.insert(0, CURRENT_DIR)
 
+# Shared packages (offline_geocoder/) sit at the repository root
+BASE_DIR = os.path.dirname(CURRENT_DIR)
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
 # ============================
 # ORIGINAL IMPORTS (UNCHANGED)
 # ============================
@@ -17,11 +22,14 @@ import requests
 from io import BytesIO
 import streamlit.components.v1 as components
 
-from apify_fetcher import fetch_instagram, fetch_facebook
+from apify_fetcher import fetch_many
 from normalizer import normalize_post
 from graph_builder import build_semantic_knowledge_graph
 from pyvis_renderer import render_graph_pyvis
 
+PLATFORM_KEYS = {"Instagram": "instagram", "Facebook": "facebook"}
+PLATFORM_LABELS = {key: label for label, key in PLATFORM_KEYS.items()}
+
 
 # ============================================================
 # MAIN WRAPPER (REQUIRED FOR UNIFIED APP)
@@ -41,13 +49,14 @@ def main():
     # ============================
     # SIDEBAR INPUTS
     # ============================
-    platform = st.sidebar.selectbox(
-        "Select Platform",
-        ["Instagram", "Facebook"]
+    platforms = st.sidebar.multiselect(
+        "Select Platforms",
+        list(PLATFORM_KEYS),
+        default=["Instagram"]
     )
 
-    username = st.sidebar.text_input(
-        "Target username / page",
+    usernames = st.sidebar.text_input(
+        "Target usernames / pages (comma-separated)",
         placeholder="e.g. carryminati"
     )
 
@@ -65,23 +74,7 @@ def main():
             pass
         return None
 
-    # ============================
-    # MAIN EXECUTION
-    # ============================
-    if run and username:
-        st.info("Collecting public intelligence…")
-
-        if platform == "Instagram":
-            raw = fetch_instagram(username)
-            key = "instagram"
-        else:
-            raw = fetch_facebook(username)
-            key = "facebook"
-
-        if not raw:
-            st.warning("No public posts could be retrieved.")
-            st.stop()
-
+    def render_target(key, username, raw):
         posts = [
             normalize_post(p, key, i)
             for i, p in enumerate(raw[:7], 1)
@@ -91,7 +84,7 @@ def main():
         # ============================
         # POSTS DISPLAY
         # ============================
-        st.markdown("## 📸 Captured Posts")
+        st.markdown("### 📸 Captured Posts")
 
         cols = st.columns(3)
         for idx, post in enumerate(posts):
@@ -99,7 +92,7 @@ def main():
                 raw_post = raw[idx] if idx < len(raw) else {}
                 shortcode = raw_post.get("shortCode")
 
-                if shortcode and platform == "Instagram":
+                if shortcode and key == "instagram":
                     components.html(
                         f"""
                         <iframe
@@ -127,7 +120,7 @@ def main():
         # ============================
         # GRAPH GENERATION
         # ============================
-        st.markdown("## 🕸️ Intelligence Knowledge Graph")
+        st.markdown("### 🕸️ Intelligence Knowledge Graph")
 
         graph = build_semantic_knowledge_graph(posts, username, key)
 
@@ -141,7 +134,38 @@ def main():
                 scrolling=True
             )
 
-        st.success("Intelligence analysis completed.")
+    # ============================
+    # MAIN EXECUTION
+    # ============================
+    targets = list(dict.fromkeys(
+        (PLATFORM_KEYS[platform], username.strip())
+        for username in usernames.split(",") if username.strip()
+        for platform in platforms
+    ))
+
+    if run and targets:
+        progress = st.progress(0.0, text=f"Collecting public intelligence from {len(targets)} targets…")
+
+        # Every actor runs at once (up to the concurrency cap); each
+        # target is rendered the moment its run finishes
+        done = 0
+        found = 0
+        for key, username, raw, error in fetch_many(targets):
+            done += 1
+            progress.progress(done / len(targets), text=f"{done}/{len(targets)} runs finished")
+
+            st.markdown(f"## {PLATFORM_LABELS[key]} · {username}")
+            if error:
+                st.warning(f"{PLATFORM_LABELS[key]} run for {username}: {error}")
+            if not raw:
+                st.warning("No public posts could be retrieved.")
+                continue
+
+            found += 1
+            render_target(key, username, raw)
+
+        if found:
+            st.success("Intelligence analysis completed.")
 
 
 # ============================================================
@@ -0,0 +1,10 @@
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Same path registration as unified_app.py, so modules import by flat name
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "image_checker"))
+sys.path.insert(0, os.path.join(BASE_DIR, "social_intelligence"))
+sys.path.insert(0, os.path.join(BASE_DIR, "Reverse_OSINT"))
@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+
+# config.py refuses to load without a token; the fake client never uses it
+os.environ.setdefault("APIFY_TOKEN", "test-token")
+
+from apify_fetcher import fetch_many, run_actor  # noqa: E402
+
+
+# --------------------------------------------------
+# Fake Apify client
+# --------------------------------------------------
+def _target(run_input):
+    if "directUrls" in run_input:
+        return run_input["directUrls"][0]
+    return run_input["startUrls"][0]["url"]
+
+
+class FakeApify:
+    """
+    Stands in for ApifyClient. Each actor call sleeps for the target's
+    duration; targets in fail raise, targets in hang come back still
+    RUNNING when the caller stops waiting.
+    """
+
+    def __init__(self, durations=None, fail=(), hang=()):
+        self.durations = durations or {}
+        self.fail = set(fail)
+        self.hang = set(hang)
+
+        self._lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+        self.aborted = []
+
+    def actor(self, actor_id):
+        return _FakeActor(self)
+
+    def run(self, run_id):
+        return _FakeRun(self, run_id)
+
+    def dataset(self, dataset_id):
+        return _FakeDataset(dataset_id)
+
+
+class _FakeActor:
+
+    def __init__(self, api):
+        self.api = api
+
+    def call(self, run_input, timeout_secs=None, wait_secs=None):
+        api = self.api
+        target = _target(run_input)
+
+        with api._lock:
+            api.calls.append(target)
+            api.active += 1
+            api.peak = max(api.peak, api.active)
+        try:
+            time.sleep(api.durations.get(target, 0.05))
+            if target in api.fail:
+                raise RuntimeError(f"actor failed for {target}")
+            status = "RUNNING" if target in api.hang and wait_secs else "SUCCEEDED"
+            return {"id": f"run:{target}", "status": status, "defaultDatasetId": target}
+        finally:
+            with api._lock:
+                api.active -= 1
+
+
+class _FakeRun:
+
+    def __init__(self, api, run_id):
+        self.api = api
+        self.run_id = run_id
+
+    def abort(self):
+        with self.api._lock:
+            self.api.aborted.append(self.run_id)
+
+
+class _FakeDataset:
+
+    def __init__(self, dataset_id):
+        self.dataset_id = dataset_id
+
+    def iterate_items(self):
+        yield {"url": self.dataset_id}
+        # Actors sometimes store non-dict rows
+        yield "junk"
+
+
+def url(platform, username):
+    if platform == "instagram":
+        return f"https://www.instagram.com/{username}/"
+    return f"https://www.facebook.com/{username}/"
+
+
+# --------------------------------------------------
+# Tests
+# --------------------------------------------------
+def test_concurrency_cap_is_respected():
+    api = FakeApify(durations={url("instagram", f"user{i}"): 0.1 for i in range(8)})
+    targets = [("instagram", f"user{i}") for i in range(8)]
+
+    results = list(fetch_many(targets, max_concurrency=3, api=api))
+
+    assert len(results) == 8
+    assert api.peak == 3
+
+
+def test_results_arrive_in_completion_order():
+    durations = {
+        url("instagram", "slow"): 0.6,
+        url("facebook", "fast"): 0.05,
+        url("instagram", "medium"): 0.3,
+    }
+    api = FakeApify(durations=durations)
+    targets = [("instagram", "slow"), ("facebook", "fast"), ("instagram", "medium")]
+
+    results = list(fetch_many(targets, max_concurrency=3, api=api))
+
+    assert [username for _, username, _, _ in results] == ["fast", "medium", "slow"]
+    assert all(error is None for _, _, _, error in results)
+    # Non-dict dataset rows are dropped
+    assert results[0][2] == [{"url": url("facebook", "fast")}]
+
+
+def test_exception_becomes_an_error():
+    api = FakeApify(fail={url("facebook", "broken")})
+    targets = [("facebook", "broken"), ("instagram", "fine")]
+
+    results = {username: (items, error) for _, username, items, error in fetch_many(targets, api=api)}
+
+    assert results["broken"] == ([], "RuntimeError: actor failed for https://www.facebook.com/broken/")
+    assert results["fine"][1] is None
+
+
+def test_still_running_run_is_aborted():
+    stuck = url("instagram", "stuck")
+    api = FakeApify(hang={stuck})
+
+    items, error = run_actor("instagram", "stuck", timeout_secs=1, api=api)
+
+    assert api.aborted == [f"run:{stuck}"]
+    assert error == "Run TIMED-OUT"
+    # Whatever the run stored before the abort is kept
+    assert items == [{"url": stuck}]
+
+
+def test_duplicate_targets_run_once():
+    api = FakeApify()
+    targets = [("instagram", "a"), ("facebook", "a"), ("instagram", "a"), ("facebook", "a")]
+
+    results = list(fetch_many(targets, api=api))
+
+    assert sorted((platform, username) for platform, username, _, _ in results) == [
+        ("facebook", "a"), ("instagram", "a")
+    ]
+    assert sorted(api.calls) == sorted([url("facebook", "a"), url("instagram", "a")])
+
+
+def test_closing_early_cancels_queued_runs():
+    api = FakeApify(durations={url("instagram", f"user{i}"): 0.2 for i in range(6)})
+    targets = [("instagram", f"user{i}") for i in range(6)]
+
+    results = fetch_many(targets, max_concurrency=2, api=api)
+    next(results)
+    results.close()
+
+    # Let the run still in flight finish
+    time.sleep(0.4)
+    assert len(api.calls) < len(targets)
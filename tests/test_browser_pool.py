@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+import browser_pool
+from browser_pool import DriverPool
+
+
+# --------------------------------------------------
+# Fake Chrome
+# --------------------------------------------------
+class FakeDriver:
+    """
+    The parts of a WebDriver the pool uses. A dead driver fails every
+    command, like a crashed Chrome.
+    """
+
+    def __init__(self):
+        self.dead = False
+        self.quit_called = False
+        self.window_handles = ["main"]
+        self.switch_to = self
+
+    def _check(self):
+        if self.dead:
+            raise WebDriverException("chrome not reachable")
+
+    def execute_script(self, script, *args):
+        self._check()
+        return 1
+
+    def execute_cdp_cmd(self, cmd, params):
+        self._check()
+
+    def window(self, handle):
+        self._check()
+
+    def delete_all_cookies(self):
+        self._check()
+
+    def get(self, url):
+        self._check()
+
+    def quit(self):
+        self.quit_called = True
+
+
+class Launcher:
+
+    def __init__(self):
+        self.error = None
+        self.calls = 0
+        self.drivers = []
+        self._lock = threading.Lock()
+
+    def __call__(self, profile):
+        with self._lock:
+            self.calls += 1
+        if self.error:
+            raise self.error
+        driver = FakeDriver()
+        with self._lock:
+            self.drivers.append(driver)
+        return driver
+
+
+@pytest.fixture
+def launcher(monkeypatch):
+    launcher = Launcher()
+    monkeypatch.setattr(browser_pool, "launch_driver", launcher)
+    return launcher
+
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+# --------------------------------------------------
+# Tests
+# --------------------------------------------------
+def test_driver_is_reused_then_recycled(launcher):
+    pool = DriverPool(size=1, max_uses=2, prelaunch=False)
+    try:
+        with pool.borrow() as first:
+            pass
+        with pool.borrow() as second:
+            pass
+        assert second is first
+
+        # Two uses: replaced by a fresh driver in the background
+        wait_until(lambda: len(launcher.drivers) == 2)
+        with pool.borrow() as third:
+            pass
+        assert third is not first
+        assert first.quit_called
+        assert pool.stats()["Recycled"] == 1
+    finally:
+        pool.close()
+
+
+def test_dead_idle_driver_is_replaced_on_checkout(launcher):
+    pool = DriverPool(size=1, max_uses=10, prelaunch=False)
+    try:
+        with pool.borrow() as first:
+            pass
+        first.dead = True
+
+        with pool.borrow() as second:
+            pass
+
+        assert second is not first
+        assert pool.stats()["Crashed"] == 1
+    finally:
+        pool.close()
+
+
+def test_launch_errors_do_not_shrink_the_pool(launcher):
+    # A missing chromedriver is an OSError, not a WebDriverException
+    launcher.error = OSError("chromedriver not found")
+    pool = DriverPool(size=2, max_uses=10)
+    try:
+        # The prelaunch failed and gave its slot back
+        wait_until(lambda: launcher.calls and pool._total == 0)
+        with pytest.raises(OSError):
+            with pool.borrow(timeout=1):
+                pass
+
+        launcher.error = None
+        with pool.borrow(timeout=1) as a, pool.borrow(timeout=1) as b:
+            assert a is not b
+    finally:
+        pool.close()
@@ -0,0 +1,215 @@
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from bulk_scanner import bulk_scan, make_session
+from host_scheduler import HostScheduler
+from http_cache import ResponseCache
+from scan_history import ScanHistory
+
+PAGE = b"<html><head><script>console.log('stand-in');</script></head><body></body></html>"
+
+
+# --------------------------------------------------
+# Local HTTP stand-in
+# --------------------------------------------------
+class Load:
+    """
+    Requests in flight, overall and per server, with their peaks.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.active_by_host = {}
+        self.peak_by_host = {}
+
+    def enter(self, host):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.active_by_host[host] = self.active_by_host.get(host, 0) + 1
+            self.peak_by_host[host] = max(self.peak_by_host.get(host, 0), self.active_by_host[host])
+
+    def leave(self, host):
+        with self._lock:
+            self.active -= 1
+            self.active_by_host[host] -= 1
+
+
+def _handler(load, status=200, headers=None):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            host = self.server.server_address[1]
+            load.enter(host)
+            try:
+                # ?delay=<seconds> before the response starts
+                query = parse_qs(urlsplit(self.path).query)
+                time.sleep(float(query.get("delay", ["0"])[0]))
+
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(PAGE)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(PAGE)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up (timeout tests)
+                pass
+            finally:
+                load.leave(host)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+@contextmanager
+def stand_in(load, count=1, status=200, headers=None):
+    """
+    count local servers (distinct hosts to the scheduler), yielding
+    their base URLs.
+    """
+    servers = [ThreadingHTTPServer(("127.0.0.1", 0), _handler(load, status, headers))
+               for _ in range(count)]
+    for server in servers:
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        yield [f"http://127.0.0.1:{server.server_address[1]}" for server in servers]
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+
+def fast_scheduler(per_host, **kwargs):
+    # No rate limiting, so only the concurrency caps shape the run
+    return HostScheduler(
+        rate=1000.0, burst=1000, max_rate=1000.0,
+        initial_concurrency=per_host, max_concurrency=per_host, **kwargs
+    )
+
+
+def run(urls, max_workers=8, per_host=4, timeout=5, **kwargs):
+    scheduler = kwargs.pop("scheduler", None) or fast_scheduler(per_host)
+    return list(bulk_scan(
+        urls, max_workers=max_workers, per_host=per_host, timeout=timeout,
+        session=make_session(max_workers), scheduler=scheduler, **kwargs
+    ))
+
+
+# --------------------------------------------------
+# Tests
+# --------------------------------------------------
+def test_results_stream_in_completion_order():
+    load = Load()
+    delays = [0.9, 0.1, 0.5]
+
+    with stand_in(load, count=len(delays)) as bases:
+        urls = [f"{base}/?delay={delay}" for base, delay in zip(bases, delays)]
+        started = time.monotonic()
+        arrivals = []
+        for result in bulk_scan(urls, max_workers=8, timeout=5,
+                                session=make_session(8), scheduler=fast_scheduler(4)):
+            arrivals.append((result["URL"], time.monotonic() - started))
+
+    assert [url for url, _ in arrivals] == [urls[1], urls[2], urls[0]]
+    # The fastest page is handed over before the slowest one finishes
+    assert arrivals[0][1] < 0.9
+
+
+def test_global_concurrency_cap():
+    load = Load()
+
+    with stand_in(load, count=4) as bases:
+        urls = [f"{base}/{i}?delay=0.2" for base in bases for i in range(4)]
+        results = run(urls, max_workers=3, per_host=4)
+
+    assert len(results) == len(urls)
+    assert all(result["Status"] == "ok" for result in results)
+    assert load.peak == 3
+
+
+def test_per_host_concurrency_cap():
+    load = Load()
+
+    with stand_in(load, count=2) as bases:
+        urls = [f"{base}/{i}?delay=0.2" for base in bases for i in range(6)]
+        results = run(urls, max_workers=16, per_host=2)
+
+    assert len(results) == len(urls)
+    assert all(result["Status"] == "ok" for result in results)
+    assert max(load.peak_by_host.values()) == 2
+    # Both hosts were scanned side by side within the global cap
+    assert load.peak > 2
+
+
+def test_timeouts_become_error_rows():
+    load = Load()
+
+    with stand_in(load, count=2) as (slow, fast):
+        urls = [f"{slow}/?delay=2", f"{fast}/"]
+        results = run(urls, timeout=0.3, max_retries=0)
+
+    by_url = {result["URL"]: result for result in results}
+    assert by_url[urls[1]]["Status"] == "ok"
+    assert by_url[urls[0]]["Status"] == "error"
+    assert "Timeout" in by_url[urls[0]]["Error"]
+    assert by_url[urls[0]]["Trackers"] == []
+
+
+def test_retry_after_past_the_cooldown_does_not_hang():
+    # A half-open host whose Retry-After outlasts the breaker cooldown
+    # used to stay marked as probing with nothing in flight
+    load = Load()
+
+    with stand_in(load, status=503, headers={"Retry-After": "1"}) as (base,):
+        urls = [f"{base}/1", f"{base}/2"]
+        scheduler = fast_scheduler(2, failure_threshold=2, cooldown=0.3, backoff_base=0.01)
+
+        results = []
+        worker = threading.Thread(
+            target=lambda: results.extend(run(urls, per_host=2, scheduler=scheduler)),
+            daemon=True
+        )
+        worker.start()
+        worker.join(timeout=15)
+
+    assert not worker.is_alive()
+    assert sorted(result["URL"] for result in results) == urls
+    # Retries ran out on a 503: no page was scanned
+    assert all(result["Status"] == "error" for result in results)
+    assert all(result["Error"] == "HTTP 503" for result in results)
+
+
+def test_cache_and_history_modes_retry_error_statuses(tmp_path):
+    # Both modes used to report a 503 as an ok scan with no trackers,
+    # without a status for the scheduler to retry on
+    load = Load()
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    history = ScanHistory(str(tmp_path / "history.sqlite"))
+
+    try:
+        with stand_in(load, status=503) as (base,):
+            cached = run([f"{base}/cache"], max_retries=1, cache=cache)
+            tracked = run([f"{base}/history"], max_retries=1, history=history)
+
+        for (result,) in (cached, tracked):
+            assert result["Status"] == "error"
+            assert result["Error"] == "HTTP 503"
+            assert result["HTTP Status"] == 503
+            assert result["Attempts"] == 2
+
+        assert cache.get(f"{base}/cache") is None
+    finally:
+        cache.close()
+        history.close()
@@ -0,0 +1,19 @@
+import pytest
+
+from entity_extractor import extract_locations
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Lunch in New Delhi", ["New Delhi"]),
+    ("just landed in mumbai", ["Mumbai"]),
+    ("#PathaanInDelhi #LondonLife", ["Delhi", "London"]),
+    # Short names only match a whole tag
+    ("#goals #Goa", ["Goa"]),
+    # Names that are as often people or brands need a cue word
+    ("Paris Hilton at the Met gala", []),
+    ("New Jordan shoes #JordanShoes", []),
+    ("Flew in from Jordan", ["Jordan"]),
+    ("that was nice", []),
+])
+def test_extract_locations(text, expected):
+    assert sorted(extract_locations(text)) == expected
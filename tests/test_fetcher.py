@@ -0,0 +1,20 @@
+import pytest
+
+import fetcher
+
+
+def test_brotli_bomb_stops_at_the_cap():
+    brotli = pytest.importorskip("brotli")
+    if fetcher.brotli is None:
+        pytest.skip("installed brotli cannot bound its output")
+
+    # 50 MB of HTML in a few hundred bytes
+    bomb = brotli.compress(b"<html>" + b"a" * (50 * 1024 * 1024))
+    decompressor, supported = fetcher._decompressor("br")
+    assert supported
+
+    cap = 1024 * 1024
+    data, cap_reached = fetcher._decode(decompressor, bomb, cap)
+
+    assert cap_reached
+    assert len(data) == cap
@@ -0,0 +1,102 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fetcher import MAX_PAGE_BYTES, PageFetchError
+from http_cache import ResponseCache, scan_with_cache
+
+PAGE = b"<html><head><script>window.ga = function () {};</script></head></html>"
+ETAG = '"v1"'
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        try:
+            if self.path == "/page":
+                if self.headers.get("If-None-Match") == ETAG:
+                    self.send_response(304)
+                    self.send_header("ETag", ETAG)
+                    self.end_headers()
+                    return
+                self._send("text/html", PAGE, {"ETag": ETAG})
+            elif self.path == "/big":
+                # Twice the page cap, in one HTML document
+                body = b"<html><body>" + b"x" * (2 * MAX_PAGE_BYTES) + b"</body></html>"
+                self._send("text/html", body, {"ETag": ETAG})
+            elif self.path == "/busy":
+                self.send_response(503)
+                self.send_header("Retry-After", "1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            elif self.path == "/video":
+                self._send("video/mp4", b"\0" * MAX_PAGE_BYTES, {"ETag": ETAG})
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading at its cap
+            pass
+
+    def _send(self, content_type, body, headers):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def base():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    yield cache
+    cache.close()
+
+
+def test_unchanged_page_is_revalidated(base, cache):
+    scripts, findings, cached, fetch = scan_with_cache(f"{base}/page", cache, external=False)
+    assert not cached
+    assert fetch["status_code"] == 200
+    assert scripts
+
+    again, again_findings, cached, fetch = scan_with_cache(f"{base}/page", cache, external=False)
+    assert cached
+    assert fetch["status_code"] == 304
+    assert again == scripts
+    assert again_findings == findings
+    assert cache.stats()["Bytes Saved"] == len(PAGE)
+
+
+def test_large_page_is_read_up_to_the_cap(base, cache):
+    scan_with_cache(f"{base}/big", cache, external=False)
+
+    entry = cache.get(f"{base}/big")
+    assert entry is not None
+    assert entry["body_bytes"] <= MAX_PAGE_BYTES + 64 * 1024
+
+
+def test_non_html_is_neither_read_nor_stored(base, cache):
+    with pytest.raises(PageFetchError, match="content-type video/mp4"):
+        scan_with_cache(f"{base}/video", cache, external=False)
+
+    assert cache.get(f"{base}/video") is None
+
+
+def test_error_status_is_raised_not_stored(base, cache):
+    with pytest.raises(PageFetchError, match="HTTP 503"):
+        scan_with_cache(f"{base}/busy", cache, external=False)
+
+    assert cache.get(f"{base}/busy") is None
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from offline_geocoder.geocode import Gazetteer, KDTree, _to_xyz, get_gazetteer, reverse_geocode
+
+
+def test_kd_tree_agrees_with_a_linear_scan():
+    rng = random.Random(7)
+    points = [_to_xyz(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(500)]
+    tree = KDTree(points)
+
+    for _ in range(200):
+        query = _to_xyz(rng.uniform(-90, 90), rng.uniform(-180, 180))
+        index, distance = tree.nearest(query)
+        best = min(sum((a - b) ** 2 for a, b in zip(query, p)) for p in points)
+        assert distance == pytest.approx(best)
+        assert sum((a - b) ** 2 for a, b in zip(query, points[index])) == pytest.approx(best)
+
+
+def test_reverse_across_the_date_line():
+    gazetteer = Gazetteer([
+        {"name": "East", "aliases": [], "admin1": "", "country_code": "XX",
+         "country": "X", "latitude": 0.0, "longitude": 179.9},
+        {"name": "West", "aliases": [], "admin1": "", "country_code": "XX",
+         "country": "X", "latitude": 0.0, "longitude": 170.0},
+    ])
+
+    place = gazetteer.reverse(0.0, -179.9)
+    assert place["name"] == "East"
+    assert place["distance_km"] == pytest.approx(22.2, abs=0.1)
+
+
+def test_far_from_every_place_is_no_place():
+    # Reno: San Francisco, the nearest bundled place, is ~300 km away
+    assert reverse_geocode(39.5296, -119.8138) is None
+    assert reverse_geocode(39.5296, -119.8138, max_km=None)["name"] == "San Francisco"
+
+    oakland = reverse_geocode(37.8044, -122.2712)
+    assert oakland["name"] == "San Francisco"
+    assert oakland["distance_km"] < 20
+
+
+@pytest.mark.parametrize("name, feature, country", [
+    ("bombay", "place", "India"),
+    ("Bavaria", "region", "Germany"),
+    ("Kenya", "country", "Kenya"),
+])
+def test_lookup_prefers_places_then_regions_then_countries(name, feature, country):
+    record = get_gazetteer().lookup(name)
+
+    assert record["feature"] == feature
+    assert record["country"] == country
+
+
+def test_unknown_name_is_not_found():
+    assert get_gazetteer().lookup("Atlantis") is None
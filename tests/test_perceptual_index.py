@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+import perceptual_index
+from perceptual_index import PerceptualIndex, _popcount_table
+
+
+def test_popcount_table_matches_bit_counts():
+    values = np.array([0, 1, 0xFF, 1 << 63, (1 << 64) - 1, 0x0123456789ABCDEF], dtype=np.uint64)
+
+    assert _popcount_table(values).tolist() == [bin(int(v)).count("1") for v in values]
+
+
+@pytest.mark.parametrize("popcount", ["native", "table"])
+def test_search_finds_near_hashes(tmp_path, monkeypatch, popcount):
+    if popcount == "table":
+        # What NumPy < 2.0 runs
+        monkeypatch.setattr(perceptual_index, "_popcount", _popcount_table)
+
+    index = PerceptualIndex(str(tmp_path / "index.sqlite"))
+    try:
+        base = 0xF0F0F0F0F0F0F0F0
+        index.add("a" * 64, [(1.0, base, 0)])
+        index.add("b" * 64, [(1.0, base ^ 0b111, 0)])
+        index.add("c" * 64, [(1.0, ~base & ((1 << 64) - 1), 0)])
+
+        matches = index.search([(1.0, base ^ 0b1, 0)])
+    finally:
+        index.close()
+
+    assert [(m["sha256"][0], m["distance"]) for m in matches] == [("a", 1), ("b", 2)]
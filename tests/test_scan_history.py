@@ -0,0 +1,89 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import tracker_engine
+from fetcher import PageFetchError
+from scan_history import ScanHistory, incremental_scan
+
+GA = b"<script>gtag('config', 'G-1');</script>"
+HOTJAR = b"<script>window.hotjar = {};</script>"
+
+
+class Site:
+    """
+    What the stand-in serves next: a status and the scripts in its page.
+    """
+    status = 200
+    scripts = b""
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = b"<html><head>" + Site.scripts + b"</head><body></body></html>"
+        self.send_response(Site.status)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site(monkeypatch, tmp_path):
+    # No compiled blocklist: only tracker_list.json is matched
+    monkeypatch.setattr(tracker_engine, "TRACKER_INDEX_PATH", str(tmp_path / "none.bin"))
+    monkeypatch.setattr(Site, "status", 200)
+    monkeypatch.setattr(Site, "scripts", b"")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = ScanHistory(str(tmp_path / "history.sqlite"))
+    yield history
+    history.close()
+
+
+def test_rescans_report_added_and_removed_trackers(site, history):
+    Site.scripts = GA
+    first = incremental_scan(site, history)
+    assert first["Diff"]["First Scan"]
+    assert first["Diff"]["Added"] == ["Google Analytics"]
+
+    # Same scripts: nothing changed and nothing is analyzed again
+    again = incremental_scan(site, history)
+    assert (again["Diff"]["Added"], again["Diff"]["Removed"]) == ([], [])
+    assert again["Diff"]["Unchanged Pages"] == [site]
+    assert again["Script Misses"] == 0
+
+    Site.scripts = HOTJAR
+    changed = incremental_scan(site, history)
+    assert changed["Diff"]["Added"] == ["Hotjar"]
+    assert changed["Diff"]["Removed"] == ["Google Analytics"]
+    assert changed["Diff"]["Changed Pages"] == [site]
+
+
+def test_unscannable_landing_page_is_not_recorded(site, history):
+    Site.scripts = GA
+    incremental_scan(site, history)
+
+    # A 503 used to be recorded as a scan with no trackers, so the next
+    # good scan showed every tracker as removed and added again
+    Site.status = 503
+    with pytest.raises(PageFetchError, match="HTTP 503"):
+        incremental_scan(site, history)
+
+    Site.status = 200
+    after = incremental_scan(site, history)
+    assert (after["Diff"]["Added"], after["Diff"]["Removed"]) == ([], [])
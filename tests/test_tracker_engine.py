@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+import tracker_engine
+from scanner import ScriptExtractor, resource_urls
+from tracker_engine import SUBSTRING_SCAN_BELOW, build_matcher, detect_trackers, match_keywords
+
+
+def tracker_db(count):
+    # Keywords that contain, prefix and overlap each other, like the
+    # real list ("ga(" / "gtag(", "insight" / "cloudflareinsights")
+    stems = ["ga(", "gtag(", "tag", "insight", "cloudflareinsights", "fbq(", "seg", "segment"]
+    keywords = stems + [f"tracker{i}.js" for i in range(count - len(stems))]
+    return {
+        f"tracker_{i}": {"keywords": keywords[i::4], "domains": []}
+        for i in range(4)
+    }
+
+
+@pytest.mark.parametrize("count", [16, SUBSTRING_SCAN_BELOW * 3])
+def test_matcher_finds_what_a_substring_scan_finds(count):
+    db = tracker_db(count)
+    keywords = {keyword for info in db.values() for keyword in info["keywords"]}
+    matcher = build_matcher(db)
+    # Short lists are scanned keyword by keyword, long ones by the regex
+    assert (matcher["pattern"] is None) == (count < SUBSTRING_SCAN_BELOW)
+
+    pieces = sorted(keywords) + ["window.", "(", ";", "gta", "insigh", "x"]
+    rng = random.Random(count)
+    for _ in range(300):
+        script = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        assert match_keywords(matcher, script) == {k for k in keywords if k in script}
+
+
+def test_only_resources_the_page_loads_are_classified(tmp_path, monkeypatch):
+    # No compiled blocklist: only tracker_list.json domains count
+    monkeypatch.setattr(tracker_engine, "TRACKER_INDEX_PATH", str(tmp_path / "none.bin"))
+
+    parser = ScriptExtractor()
+    parser.feed("""
+        <a href="https://www.hotjar.com/">Heatmaps by Hotjar</a>
+        <link rel="preconnect" href="https://cdn.segment.com">
+        <link rel="stylesheet preload" href="https://static.ads-twitter.com/style.css">
+        <script async src="https://www.googletagmanager.com/gtm.js"></script>
+        <img src="https://px.ads.linkedin.com/collect?pid=1" alt="">
+    """)
+    parser.close()
+
+    urls = resource_urls(parser.resources, "https://example.com/")
+    trackers = {finding["Tracker"] for finding in detect_trackers([], urls=urls)}
+
+    assert trackers == {"Google Analytics", "Twitter Pixel", "Linkedin Insight"}
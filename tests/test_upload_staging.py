@@ -0,0 +1,34 @@
+import errno
+import os
+import tempfile
+
+import upload_staging
+from upload_staging import stage_bytes
+
+
+def test_full_staging_dir_falls_back_to_temp(tmp_path, monkeypatch):
+    shm = tmp_path / "shm"
+    shm.mkdir()
+    monkeypatch.setattr(upload_staging, "STAGING_DIR", str(shm))
+
+    named_temporary_file = tempfile.NamedTemporaryFile
+
+    def full_shm(dir=None, **kwargs):
+        tmp = named_temporary_file(dir=dir, **kwargs)
+        if dir == str(shm):
+            def write(data):
+                raise OSError(errno.ENOSPC, "No space left on device")
+            tmp.write = write
+        return tmp
+
+    monkeypatch.setattr(upload_staging.tempfile, "NamedTemporaryFile", full_shm)
+
+    path = stage_bytes(b"image bytes", ".jpg")
+    try:
+        assert os.path.dirname(path) == tempfile.gettempdir()
+        with open(path, "rb") as f:
+            assert f.read() == b"image bytes"
+        # The partial file is not left behind in tmpfs
+        assert os.listdir(shm) == []
+    finally:
+        os.remove(path)